@@ -1,23 +1,81 @@
 """
 Research agent for gathering and analyzing information.
 """
-from typing import Dict, List, Any, Optional
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+import asyncio
+import re
+import orjson
+from typing import AsyncIterator, Dict, List, Any, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from app.core.cache import SingleFlight, create_cache, make_cache_key
 from app.core.llm import llm_manager
-from app.tools.web_search import get_web_search_tools
+from app.tools.web_search import SearchFailure, get_web_search_tools
 from app.graph.state import AgentState
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Keywords that suggest research is needed
+RESEARCH_KEYWORDS = frozenset({
+    "search", "find", "research", "information", "latest", "current",
+    "recent", "news", "data", "statistics", "facts", "explain", "learn",
+    "discover", "what is", "how to", "tell me about"
+})
+
+# One pass over the lowercase input. Keywords must start a word, as in the
+# supervisor, so inflected forms like "searching" or "findings" still count
+RESEARCH_KEYWORD_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in sorted(RESEARCH_KEYWORDS, key=lambda keyword: (-len(keyword), keyword))) + ")"
+)
+
+# Synthesis prompts are kept terse; every token here is paid on each research call
+SYNTHESIS_SYSTEM_PROMPT = "You are an expert research analyst. Synthesize research results into a well-organized answer."
+
+SYNTHESIS_INSTRUCTIONS = (
+    "Synthesize the results above in markdown with sections: key findings; "
+    "patterns/trends; reliable sources; conflicts; insights/recommendations; "
+    "open questions. Cite sources."
+)
+
+# Upper bound on tool calls run concurrently for a single research request
+MAX_CONCURRENT_TOOL_CALLS = 5
+
 class ResearchAgent:
     """Agent specialized in research and information gathering."""
     
     def __init__(self):
-        self.llm = llm_manager.llm
+        # Set only to override the manager's model, e.g. in tests
+        self._llm: Optional[BaseChatModel] = None
         self.tools = get_web_search_tools()
+        self.tool_map = {tool.name: tool for tool in self.tools}
+        self.tool_cache = create_cache()
+        self.synthesis_cache = create_cache()
+        # Identical tool or synthesis calls already running are joined, not repeated
+        self.inflight = SingleFlight()
         self.system_prompt = self._create_system_prompt()
+        self._research_chain: Optional[Runnable] = None
+        self._research_chain_llm: Optional[BaseChatModel] = None
+    
+    @property
+    def llm(self) -> BaseChatModel:
+        """The research model, looked up per call so a rebuilt manager client is picked up."""
+        return self._llm if self._llm is not None else llm_manager.llm
+    
+    @llm.setter
+    def llm(self, llm: BaseChatModel) -> None:
+        self._llm = llm
+    
+    @property
+    def research_chain(self) -> Runnable:
+        """The tool-bound chain, rebuilt only when the model changes."""
+        llm = self.llm
+        if self._research_chain is None or self._research_chain_llm is not llm:
+            self._research_chain = self._create_research_chain(llm)
+            self._research_chain_llm = llm
+        return self._research_chain
     
     def _create_system_prompt(self) -> str:
         """Create the system prompt for the research agent."""
@@ -48,123 +106,210 @@ class ResearchAgent:
         4. Summarize findings with proper attribution
         """
     
+    def _create_research_chain(self, llm: BaseChatModel) -> Runnable:
+        """Build the prompt and tool-bound LLM chain; the tool set is fixed."""
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", self.system_prompt.format(
+                tools=", ".join(tool.name for tool in self.tools)
+            )),
+            MessagesPlaceholder(variable_name="messages"),
+            ("human", "Please research the following topic: {query}")
+        ])
+        
+        return prompt | llm.bind_tools(self.tools)
+    
     async def research(self, state: AgentState) -> AgentState:
         """Conduct research based on the current state and user query."""
         try:
             user_query = state["user_input"]
             logger.info(f"Research agent processing query: {user_query}")
             
-            # Create the research prompt
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", self.system_prompt.format(
-                    tools=", ".join([tool.name for tool in self.tools])
-                )),
-                MessagesPlaceholder(variable_name="messages"),
-                ("human", f"Please research the following topic: {user_query}")
-            ])
-            
-            # Bind tools to the LLM
-            llm_with_tools = self.llm.bind_tools(self.tools)
+            research_results = await self._gather_research(state, user_query)
             
-            # Create the research chain
-            research_chain = prompt | llm_with_tools
+            # Synthesize research results
+            synthesis = await self._synthesize(user_query, research_results)
             
-            # Execute research
-            messages = state.get("messages", [])
-            response = await research_chain.ainvoke({"messages": messages})
+            self._record_research(state, user_query, research_results, synthesis)
+            logger.info("Research completed successfully")
+            return state
             
-            # Process tool calls if any
-            research_results = []
-            if response.tool_calls:
-                for tool_call in response.tool_calls:
-                    tool_name = tool_call["name"]
-                    tool_args = tool_call["args"]
-                    
-                    # Find and execute the tool
-                    for tool in self.tools:
-                        if tool.name == tool_name:
-                            try:
-                                result = await tool._arun(**tool_args)
-                                research_results.append({
-                                    "tool": tool_name,
-                                    "query": tool_args,
-                                    "result": result
-                                })
-                                logger.info(f"Tool {tool_name} executed successfully")
-                            except Exception as e:
-                                logger.error(f"Tool {tool_name} failed: {e}")
-                                research_results.append({
-                                    "tool": tool_name,
-                                    "query": tool_args,
-                                    "error": str(e)
-                                })
-                            break
+        except Exception as e:
+            logger.error(f"Research agent error: {e}")
+            self._record_error(state, e)
+            return state
+    
+    async def research_stream(self, state: AgentState) -> AsyncIterator[str]:
+        """
+        Conduct research, yielding synthesis tokens as they are generated.
+        
+        The state is updated the same way as by research() once the
+        synthesis has finished.
+        """
+        try:
+            user_query = state["user_input"]
+            logger.info(f"Research agent streaming query: {user_query}")
             
-            # Synthesize research results
-            synthesis_prompt = self._create_synthesis_prompt(user_query, research_results)
-            synthesis_response = await self.llm.ainvoke([
-                SystemMessage(content="You are an expert research analyst. Synthesize the following research results into a comprehensive and well-organized response."),
-                HumanMessage(content=synthesis_prompt)
-            ])
+            research_results = await self._gather_research(state, user_query)
             
-            # Update state
-            updated_state = state.copy()
-            updated_state["research_data"] = {
-                "query": user_query,
-                "raw_results": research_results,
-                "synthesis": synthesis_response.content
-            }
-            updated_state["messages"].append(AIMessage(content=synthesis_response.content))
-            updated_state["tools_used"].extend([result.get("tool", "") for result in research_results])
-            updated_state["current_agent"] = "research"
+            chunks = []
+            async for token in self._stream_synthesis(user_query, research_results):
+                chunks.append(token)
+                yield token
             
+            self._record_research(state, user_query, research_results, "".join(chunks))
             logger.info("Research completed successfully")
-            return updated_state
             
         except Exception as e:
             logger.error(f"Research agent error: {e}")
-            error_message = f"Research failed: {str(e)}"
+            self._record_error(state, e)
+    
+    async def _gather_research(self, state: AgentState, user_query: str) -> List[Dict[str, Any]]:
+        """Let the LLM pick tool calls for the query and execute them."""
+        messages = state.get("messages", [])
+        response = await self.research_chain.ainvoke({"messages": messages, "query": user_query})
+        
+        if not response.tool_calls:
+            return []
+        return await self._execute_tool_calls(response.tool_calls)
+    
+    def _record_research(
+        self,
+        state: AgentState,
+        user_query: str,
+        research_results: List[Dict[str, Any]],
+        synthesis: str
+    ) -> None:
+        """Store research output on the state in place; nested lists and dicts are shared anyway."""
+        state["research_data"] = {
+            "query": user_query,
+            "raw_results": research_results,
+            "synthesis": synthesis
+        }
+        state["messages"].append(AIMessage(content=synthesis))
+        state["tools_used"].extend([result.get("tool", "") for result in research_results])
+        state["current_agent"] = "research"
+    
+    def _record_error(self, state: AgentState, error: Exception) -> None:
+        """Mark the state as failed with a user-facing error message."""
+        state["messages"].append(AIMessage(content=f"Research failed: {str(error)}"))
+        state["workflow_status"] = "error"
+    
+    async def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute the requested tool calls concurrently, preserving call order."""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_TOOL_CALLS)
+        
+        async def run_tool(tool: BaseTool, tool_args: Dict[str, Any]) -> str:
+            cache_key = make_cache_key(tool.name, tool_args)
+            cached = self.tool_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            async def call_tool() -> str:
+                async with semaphore:
+                    result = await tool._arun(**tool_args)
+                # Failures come back as messages; replaying them would hide a recovered tool
+                if not isinstance(result, SearchFailure):
+                    self.tool_cache.set(cache_key, result)
+                return result
             
-            updated_state = state.copy()
-            updated_state["messages"].append(AIMessage(content=error_message))
-            updated_state["workflow_status"] = "error"
-            return updated_state
+            return await self.inflight.do(cache_key, call_tool)
+        
+        # One dict lookup per call; unknown tools are skipped
+        tool_map = self.tool_map
+        calls = []
+        for tool_call in tool_calls:
+            tool_name = tool_call["name"]
+            tool = tool_map.get(tool_name)
+            if tool is None:
+                logger.warning(f"Skipping unknown tool: {tool_name}")
+                continue
+            calls.append((tool_name, tool_call["args"], tool))
+        
+        outcomes = await asyncio.gather(
+            *(run_tool(tool, tool_args) for _, tool_args, tool in calls),
+            return_exceptions=True
+        )
+        
+        research_results = []
+        for (tool_name, tool_args, _), outcome in zip(calls, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Tool {tool_name} failed: {outcome}")
+                research_results.append({
+                    "tool": tool_name,
+                    "query": tool_args,
+                    "error": str(outcome)
+                })
+            else:
+                logger.info(f"Tool {tool_name} executed successfully")
+                research_results.append({
+                    "tool": tool_name,
+                    "query": tool_args,
+                    "result": outcome
+                })
+        
+        return research_results
+    
+    async def _synthesize(self, query: str, results: List[Dict[str, Any]]) -> str:
+        """Synthesize research results, reusing earlier answers for identical inputs."""
+        cache_key = self._synthesis_cache_key(query, results)
+        cached = self.synthesis_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Using cached research synthesis")
+            return cached
+        
+        async def call_llm() -> str:
+            synthesis_response = await self.llm.ainvoke(self._synthesis_messages(query, results))
+            self.synthesis_cache.set(cache_key, synthesis_response.content)
+            return synthesis_response.content
+        
+        return await self.inflight.do(cache_key, call_llm)
+    
+    async def _stream_synthesis(self, query: str, results: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Streaming counterpart of _synthesize; a cached synthesis is yielded whole."""
+        cache_key = self._synthesis_cache_key(query, results)
+        cached = self.synthesis_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Using cached research synthesis")
+            yield cached
+            return
+        
+        chunks = []
+        async for chunk in self.llm.astream(self._synthesis_messages(query, results)):
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+        
+        self.synthesis_cache.set(cache_key, "".join(chunks))
+    
+    def _synthesis_cache_key(self, query: str, results: List[Dict[str, Any]]) -> str:
+        """Key the synthesis cache on the query and the results in any order."""
+        # Sort so that the same results in a different call order share an entry
+        ordered_results = sorted(results, key=lambda result: make_cache_key(result))
+        return make_cache_key(query, ordered_results)
+    
+    def _synthesis_messages(self, query: str, results: List[Dict[str, Any]]) -> List[BaseMessage]:
+        """Build the messages sent to the LLM for synthesis."""
+        return [
+            SystemMessage(content=SYNTHESIS_SYSTEM_PROMPT),
+            HumanMessage(content=self._create_synthesis_prompt(query, results))
+        ]
     
     def _create_synthesis_prompt(self, query: str, results: List[Dict[str, Any]]) -> str:
         """Create a prompt for synthesizing research results."""
-        prompt = f"Original Query: {query}\n\nResearch Results:\n\n"
+        parts = [f"Original Query: {query}", "Research Results:"]
         
-        for i, result in enumerate(results, 1):
-            if "error" in result:
-                prompt += f"Result {i}: Error - {result['error']}\n\n"
-            else:
-                prompt += f"Result {i} (Tool: {result['tool']}):\n"
-                prompt += f"Query: {result['query']}\n"
-                prompt += f"Result: {result['result']}\n\n"
-        
-        prompt += """
-        Please provide a comprehensive synthesis of the research results above. Include:
-        1. A clear summary of the key findings
-        2. Analysis of any patterns or trends
-        3. Identification of reliable sources
-        4. Any conflicting information found
-        5. Actionable insights or recommendations
-        6. Areas where further research might be needed
-        
-        Format your response in a clear, well-structured manner with proper citations where applicable.
-        """
+        # One C-level serialization per result instead of nested f-string formatting
+        parts.extend(
+            f"Result {i}: {orjson.dumps(result, default=str).decode()}"
+            for i, result in enumerate(results, 1)
+        )
         
-        return prompt
+        parts.append(SYNTHESIS_INSTRUCTIONS)
+        return "\n\n".join(parts)
     
     def should_research(self, state: AgentState) -> bool:
         """Determine if research is needed based on the current state."""
         user_input = state.get("user_input", "").lower()
         
-        # Keywords that suggest research is needed
-        research_keywords = [
-            "search", "find", "research", "information", "latest", "current",
-            "recent", "news", "data", "statistics", "facts", "what is",
-            "how to", "explain", "tell me about", "learn", "discover"
-        ]
-        
-        return any(keyword in user_input for keyword in research_keywords)
\ No newline at end of file
+        # Stops at the first keyword hit
+        return RESEARCH_KEYWORD_PATTERN.search(user_input) is not None
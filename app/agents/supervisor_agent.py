@@ -1,7 +1,10 @@
 """
 Supervisor agent for coordinating the multi-agent workflow.
 """
-from typing import Dict, Any, Literal
+import re
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, Literal, Optional, Tuple
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from app.core.llm import llm_manager
@@ -10,13 +13,55 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Keywords that suggest the request needs research
+RESEARCH_KEYWORDS = frozenset({
+    "search", "find", "research", "latest", "current", "recent",
+    "news", "what is", "information", "data", "statistics",
+    "compare", "versus", "vs", "trends", "developments"
+})
+
+# Single-pass matcher over all keywords (lowercase input). Keywords must start
+# a word, so "searching" counts but "search" inside "research" does not;
+# longest first so no keyword is shadowed by a shorter prefix
+RESEARCH_KEYWORD_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in sorted(RESEARCH_KEYWORDS, key=lambda keyword: (-len(keyword), keyword))) + ")"
+)
+
+# Verbs explicit enough to route to research on their own, but only as a
+# whole word leading the request ("Find the latest...", "Please search for...")
+HIGH_SIGNAL_KEYWORDS = frozenset({"search", "find", "research"})
+HIGH_SIGNAL_PATTERN = re.compile(
+    r"^\W*(?:please\s+)?(?:" + "|".join(sorted(HIGH_SIGNAL_KEYWORDS)) + r")\b"
+)
+
+# Distinct keyword hits needed for a fully confident rule-based decision
+FAST_PATH_MIN_KEYWORD_HITS = 2
+
+# Confidence at which the supervisor skips the LLM decision call
+FAST_PATH_CONFIDENCE_THRESHOLD = 1.0
+
+@lru_cache(maxsize=1024)
+def match_research_keywords(user_input: str) -> FrozenSet[str]:
+    """Return the distinct research keywords in the input, normalizing it once."""
+    return frozenset(RESEARCH_KEYWORD_PATTERN.findall(user_input.lower()))
+
 class SupervisorAgent:
     """Supervisor agent that coordinates the workflow and decides next actions."""
     
     def __init__(self):
-        self.llm = llm_manager.get_non_streaming_llm()
+        # Set only to override the manager's model, e.g. in tests
+        self._llm: Optional[BaseChatModel] = None
         self.system_prompt = self._create_system_prompt()
     
+    @property
+    def llm(self) -> BaseChatModel:
+        """The decision model, looked up per call so a rebuilt manager client is picked up."""
+        return self._llm if self._llm is not None else llm_manager.get_non_streaming_llm()
+    
+    @llm.setter
+    def llm(self, llm: BaseChatModel) -> None:
+        self._llm = llm
+    
     def _create_system_prompt(self) -> str:
         """Create the system prompt for the supervisor agent."""
         return """
@@ -56,6 +101,12 @@ class SupervisorAgent:
             user_input = state.get("user_input", "")
             logger.info(f"Supervisor analyzing request: {user_input}")
             
+            # Skip the LLM round-trip when the rules are confident
+            fast_decision, confidence = self.fast_classify(user_input)
+            if fast_decision and confidence >= FAST_PATH_CONFIDENCE_THRESHOLD:
+                logger.info(f"Supervisor fast-path decision: {fast_decision}")
+                return self._apply_decision(state, fast_decision, user_input)
+            
             # Create decision prompt
             decision_prompt = ChatPromptTemplate.from_messages([
                 ("system", self.system_prompt),
@@ -88,44 +139,50 @@ class SupervisorAgent:
                 next_action = self._fallback_decision(user_input)
             
             logger.info(f"Supervisor decision: {next_action}")
-            
-            # Update state
-            updated_state = state.copy()
-            updated_state["next_action"] = next_action
-            updated_state["current_agent"] = "supervisor"
-            
-            # Add supervisor reasoning to working memory
-            updated_state["working_memory"]["supervisor_decision"] = {
-                "decision": next_action,
-                "reasoning": f"Analyzed request: '{user_input}' -> {next_action}",
-                "user_input": user_input
-            }
-            
-            return updated_state
+            return self._apply_decision(state, next_action, user_input)
             
         except Exception as e:
             logger.error(f"Supervisor decision error: {e}")
             # Fallback decision
-            updated_state = state.copy()
-            updated_state["next_action"] = self._fallback_decision(state.get("user_input", ""))
-            updated_state["workflow_status"] = "error"
-            return updated_state
+            state["next_action"] = self._fallback_decision(state.get("user_input", ""))
+            state["workflow_status"] = "error"
+            return state
+    
+    def _apply_decision(self, state: AgentState, next_action: str, user_input: str) -> AgentState:
+        """Record the routing decision on the state."""
+        state["next_action"] = next_action
+        state["current_agent"] = "supervisor"
+        
+        # Add supervisor reasoning to working memory
+        state["working_memory"]["supervisor_decision"] = {
+            "decision": next_action,
+            "reasoning": f"Analyzed request: '{user_input}' -> {next_action}",
+            "user_input": user_input
+        }
+        
+        return state
+    
+    def fast_classify(self, user_input: str) -> Tuple[Optional[str], float]:
+        """
+        Classify obvious research requests without calling the LLM.
+        
+        Returns the decision (or None when the rules have no opinion) and a
+        confidence between 0 and 1.
+        """
+        hits = match_research_keywords(user_input)
+        if not hits:
+            return None, 0.0
+        
+        if HIGH_SIGNAL_PATTERN.match(user_input.lower()):
+            return "research", 1.0
+        
+        return "research", min(len(hits) / FAST_PATH_MIN_KEYWORD_HITS, 1.0)
     
     def _fallback_decision(self, user_input: str) -> str:
         """Fallback decision logic when LLM fails."""
         # Simple keyword-based fallback
-        research_keywords = [
-            "search", "find", "research", "latest", "current", "recent", 
-            "news", "what is", "information", "data", "statistics",
-            "compare", "versus", "vs", "trends", "developments"
-        ]
-        
-        user_lower = user_input.lower()
-        
-        # Check if any research keywords are present
-        for keyword in research_keywords:
-            if keyword in user_lower:
-                return "research"
+        if match_research_keywords(user_input):
+            return "research"
         
         # Default to respond for general queries
         return "respond"
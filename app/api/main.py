@@ -1,22 +1,34 @@
 """
 Minimal FastAPI main application file.
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import logging
 
-# Simple settings without pydantic-settings
-import os
-from dotenv import load_dotenv
+from app.api.routes import chat
+from app.core.config import Settings, get_settings
+from app.core.executor import shutdown_tool_executor
+from app.core.http import close_http_client
+from app.core.llm import llm_manager
 
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    yield
+    # Release pooled connections held by the shared tool and LLM HTTP clients
+    await close_http_client()
+    await llm_manager.aclose()
+    shutdown_tool_executor()
 
 # Create FastAPI application
 app = FastAPI(
     title="AI Agent Project",
     version="1.0.0",
-    description="An intelligent AI agent system built with LangGraph, FastAPI, and Azure OpenAI"
+    description="An intelligent AI agent system built with LangGraph, FastAPI, and Azure OpenAI",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -29,36 +41,43 @@ app.add_middleware(
 )
 
 @app.get("/")
-async def root():
+async def root(settings: Settings = Depends(get_settings)):
     """Root endpoint."""
     return {
-        "message": "Welcome to AI Agent Project",
-        "version": "1.0.0",
+        "message": f"Welcome to {settings.app_name}",
+        "version": settings.app_version,
         "status": "running"
     }
 
 @app.get("/health")
-async def health_check():
+async def health_check(settings: Settings = Depends(get_settings)):
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "service": "AI Agent Project",
-        "version": "1.0.0"
+        "service": settings.app_name,
+        "version": settings.app_version
     }
 
-@app.post("/api/v1/chat")
-async def chat_endpoint(message: dict):
-    """Simple chat endpoint."""
-    user_message = message.get("message", "")
+# Chat endpoints, including the SSE stream at /api/v1/chat/stream
+app.include_router(chat.router, prefix="/api/v1", tags=["chat"])
+
+def main() -> None:
+    """Run the API server with the C-accelerated event loop and HTTP parser."""
+    import sys
+    import uvicorn
+    settings = get_settings()
     
-    return {
-        "response": f"Echo: {user_message}",
-        "conversation_id": message.get("conversation_id", "default"),
-        "status": "completed",
-        "tools_used": [],
-        "metadata": {}
-    }
+    uvicorn.run(
+        "app.api.main:app",
+        host=settings.fastapi_host,
+        port=settings.fastapi_port,
+        # uvloop has no Windows build; fall back to the stdlib loop there
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=settings.fastapi_workers,
+        backlog=settings.fastapi_backlog,
+        timeout_keep_alive=settings.fastapi_keep_alive
+    )
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    main()
@@ -4,12 +4,16 @@ Pydantic request models for the API.
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 
+# Batched messages run one after another on one worker, so keep batches small
+MAX_BATCH_MESSAGES = 10
+
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str = Field(..., description="User message to process")
     conversation_id: Optional[str] = Field(None, description="Unique conversation identifier")
     user_id: Optional[str] = Field(None, description="User identifier")
     context: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional context")
+    no_cache: bool = Field(default=False, description="Bypass the cached answer for a repeated message")
     
     model_config = {
         "json_schema_extra": {
@@ -22,12 +26,29 @@ class ChatRequest(BaseModel):
         }
     }
 
+class BatchChatRequest(BaseModel):
+    """Request model for batch chat endpoint."""
+    messages: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_MESSAGES, description="User messages to process, in order")
+    conversation_id: Optional[str] = Field(None, description="Unique conversation identifier")
+    user_id: Optional[str] = Field(None, description="User identifier")
+    no_cache: bool = Field(default=False, description="Bypass the cached answer for repeated messages")
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "messages": ["Hello, how are you?", "What can you help me with?"],
+                "conversation_id": "conv_123",
+                "user_id": "user_456"
+            }
+        }
+    }
+
 class StreamChatRequest(BaseModel):
     """Request model for streaming chat endpoint."""
     message: str = Field(..., description="User message to process")
     conversation_id: Optional[str] = Field(None, description="Unique conversation identifier")
     user_id: Optional[str] = Field(None, description="User identifier")
-    stream_type: str = Field(default="all", description="Type of streaming (all, final, steps)")
+    stream_type: str = Field(default="all", description="Type of streaming (all, final, steps); only 'all' streams answer tokens")
     
     model_config = {
         "json_schema_extra": {
@@ -4,6 +4,11 @@ Pydantic response models for the API.
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+import time
+
+def epoch_ms() -> int:
+    """Current time as integer milliseconds since the Unix epoch."""
+    return time.time_ns() // 1_000_000
 
 class ChatResponse(BaseModel):
     """Response model for chat endpoint."""
@@ -12,9 +17,11 @@ class ChatResponse(BaseModel):
     status: str = Field(..., description="Processing status (completed, error, etc.)")
     tools_used: List[str] = Field(default_factory=list, description="List of tools used by the agent")
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional response metadata")
-    timestamp: Optional[datetime] = Field(default_factory=datetime.utcnow, description="Response timestamp")
+    timestamp_ms: int = Field(default_factory=epoch_ms, description="Response timestamp in milliseconds since the Unix epoch")
     
     model_config = {
+        "frozen": True,
+        "extra": "forbid",
         "json_schema_extra": {
             "example": {
                 "response": "Based on my research, artificial intelligence is rapidly evolving...",
@@ -25,27 +32,39 @@ class ChatResponse(BaseModel):
                     "processing_time": 3.2,
                     "sources_found": 5
                 },
-                "timestamp": "2024-01-15T10:30:00Z"
+                "timestamp_ms": 1705314600000
             }
         }
     }
 
+class BatchChatResponse(BaseModel):
+    """Response model for batch chat endpoint."""
+    responses: List[ChatResponse] = Field(..., description="One response per message, in request order")
+    conversation_id: str = Field(..., description="Unique conversation identifier")
+    
+    model_config = {
+        "frozen": True,
+        "extra": "forbid"
+    }
+
 class StreamResponse(BaseModel):
     """Response model for streaming chat endpoint."""
-    type: str = Field(..., description="Type of stream message (message, status, error, complete)")
+    type: str = Field(..., description="Type of stream message (message, token, status, error, complete)")
     content: str = Field(..., description="Stream content")
     conversation_id: Optional[str] = Field(None, description="Conversation identifier")
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Stream metadata")
-    timestamp: Optional[datetime] = Field(default_factory=datetime.utcnow, description="Stream timestamp")
+    timestamp_ms: int = Field(default_factory=epoch_ms, description="Stream timestamp in milliseconds since the Unix epoch")
     
     model_config = {
+        "frozen": True,
+        "extra": "forbid",
         "json_schema_extra": {
             "example": {
                 "type": "message",
                 "content": "I'm searching for information about your query...",
                 "conversation_id": "conv_123",
                 "metadata": {"node": "research", "step": 1},
-                "timestamp": "2024-01-15T10:30:00Z"
+                "timestamp_ms": 1705314600000
             }
         }
     }
@@ -120,15 +139,17 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error type")
     message: str = Field(..., description="Error message")
     details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Error timestamp")
+    timestamp_ms: int = Field(default_factory=epoch_ms, description="Error timestamp in milliseconds since the Unix epoch")
     
     model_config = {
+        "frozen": True,
+        "extra": "forbid",
         "json_schema_extra": {
             "example": {
                 "error": "ValidationError",
                 "message": "Invalid request parameters",
                 "details": {"field": "message", "issue": "Required field missing"},
-                "timestamp": "2024-01-15T10:30:00Z"
+                "timestamp_ms": 1705314600000
             }
         }
     }
@@ -138,16 +159,18 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Service health status")
     service: str = Field(..., description="Service name")
     version: str = Field(..., description="Service version")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Health check timestamp")
+    timestamp_ms: int = Field(default_factory=epoch_ms, description="Health check timestamp in milliseconds since the Unix epoch")
     details: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional health details")
     
     model_config = {
+        "frozen": True,
+        "extra": "forbid",
         "json_schema_extra": {
             "example": {
                 "status": "healthy",
                 "service": "AI Agent API",
                 "version": "1.0.0",
-                "timestamp": "2024-01-15T10:30:00Z",
+                "timestamp_ms": 1705314600000,
                 "details": {
                     "database": "connected",
                     "llm": "operational",
@@ -1,21 +1,137 @@
 """
 Chat API routes for the AI agent system.
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import StreamingResponse
-from typing import Dict, Any, Optional
-import json
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
 import asyncio
 import logging
+import orjson
 
-from app.api.models.requests import ChatRequest, StreamChatRequest
-from app.api.models.responses import ChatResponse, StreamResponse
+from app.api.models.requests import BatchChatRequest, ChatRequest, StreamChatRequest
+from app.api.models.responses import BatchChatResponse, ChatResponse, epoch_ms
+from app.core.config import get_settings
 from app.graph.workflow import workflow
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/chat", response_model=ChatResponse)
+# Shared byte framing for every SSE event
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+# SSE comment frame sent while idle so proxies and CDNs keep the stream open
+SSE_PING = b": ping\n\n"
+SSE_PING_INTERVAL = 15.0
+
+# How long a status frame may wait for later frames to share its write
+SSE_COALESCE_WINDOW = 0.010
+
+def sse_encoder(conversation_id: Optional[str]) -> Callable[..., bytes]:
+    """
+    Build an encoder for StreamResponse-shaped SSE frames of one conversation.
+    
+    Frames are server-built, so they skip model validation; the conversation
+    id is serialized once per stream and spliced into every frame as is.
+    """
+    conversation_json = orjson.Fragment(orjson.dumps(conversation_id))
+    
+    def encode(event_type: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> bytes:
+        payload = {
+            "type": event_type,
+            "content": content,
+            "conversation_id": conversation_json,
+            "metadata": metadata or {},
+            "timestamp_ms": epoch_ms()
+        }
+        return _SSE_PREFIX + orjson.dumps(payload) + _SSE_SUFFIX
+    
+    return encode
+
+async def with_keepalive(
+    frames: AsyncIterator[bytes],
+    interval: float = SSE_PING_INTERVAL
+) -> AsyncIterator[bytes]:
+    """Relay SSE frames, sending a ping whenever none arrives within interval seconds."""
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(frames.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield SSE_PING
+                continue
+            
+            pending = None
+            try:
+                frame = done.pop().result()
+            except StopAsyncIteration:
+                return
+            yield frame
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+async def coalesce_frames(
+    frames: AsyncIterator[Tuple[bytes, bool]],
+    window: float = SSE_COALESCE_WINDOW
+) -> AsyncIterator[bytes]:
+    """
+    Merge (frame, hold) pairs into fewer writes.
+    
+    A held frame waits up to window seconds for the frames behind it and
+    goes out with them in one chunk; any frame that is not held flushes
+    the buffer immediately.
+    """
+    loop = asyncio.get_running_loop()
+    buffer: List[bytes] = []
+    deadline = 0.0
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(frames.__anext__())
+            timeout = max(deadline - loop.time(), 0.0) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield b"".join(buffer)
+                buffer.clear()
+                continue
+            
+            pending = None
+            try:
+                frame, hold = done.pop().result()
+            except StopAsyncIteration:
+                break
+            
+            if not buffer:
+                deadline = loop.time() + window
+            buffer.append(frame)
+            if not hold:
+                yield b"".join(buffer)
+                buffer.clear()
+        
+        if buffer:
+            yield b"".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+def _chat_response(result: Dict[str, Any]) -> ChatResponse:
+    """Build the response model for a workflow result."""
+    return ChatResponse.model_construct(
+        response=result["response"],
+        conversation_id=result["conversation_id"],
+        status=result["status"],
+        tools_used=result.get("tools_used", []),
+        metadata={
+            "research_data": result.get("research_data"),
+            "processing_time": None  # You can add timing if needed
+        }
+    )
+
+@router.post("/chat", response_model=ChatResponse, response_class=ORJSONResponse)
 async def chat(request: ChatRequest) -> ChatResponse:
     """
     Process a chat message through the AI agent workflow.
@@ -30,25 +146,45 @@ async def chat(request: ChatRequest) -> ChatResponse:
         result = await workflow.process_message(
             user_input=request.message,
             conversation_id=request.conversation_id or "default",
-            user_id=request.user_id or "default"
+            user_id=request.user_id or "default",
+            use_cache=not request.no_cache
         )
         
-        response = ChatResponse(
-            response=result["response"],
-            conversation_id=result["conversation_id"],
-            status=result["status"],
-            tools_used=result.get("tools_used", []),
-            metadata={
-                "research_data": result.get("research_data"),
-                "processing_time": None  # You can add timing if needed
-            }
-        )
+        response = _chat_response(result)
         
         logger.info(f"Chat request processed successfully: {request.conversation_id}")
         return response
         
     except Exception as e:
-        logger.error(f"Chat processing error: {e}", exc_info=True)
+        logger.error(f"Chat processing error: {e}", exc_info=get_settings().debug)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/chat/batch", response_model=BatchChatResponse, response_class=ORJSONResponse)
+async def chat_batch(request: BatchChatRequest) -> BatchChatResponse:
+    """
+    Process several chat messages in one request.
+    
+    Messages share one conversation, so they run one after another in
+    request order; batching saves the per-message HTTP round-trip.
+    """
+    try:
+        conversation_id = request.conversation_id or "default"
+        logger.info(f"Processing {len(request.messages)} batched messages for conversation: {conversation_id}")
+        
+        responses = []
+        for message in request.messages:
+            result = await workflow.process_message(
+                user_input=message,
+                conversation_id=conversation_id,
+                user_id=request.user_id or "default",
+                use_cache=not request.no_cache
+            )
+            responses.append(_chat_response(result))
+        
+        return BatchChatResponse.model_construct(responses=responses, conversation_id=conversation_id)
+        
+    except Exception as e:
+        logger.error(f"Batch chat processing error: {e}", exc_info=get_settings().debug)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/chat/stream")
@@ -57,86 +193,65 @@ async def stream_chat(request: StreamChatRequest):
     Stream a chat conversation through the AI agent workflow.
     
     This endpoint provides real-time streaming of the agent's processing steps.
+    With stream_type "all", research synthesis and direct answer tokens are
+    also streamed as "token" messages while they are generated.
     """
     try:
         logger.info(f"Starting stream chat for conversation: {request.conversation_id}")
         
-        async def generate_stream():
+        sse_frame = sse_encoder(request.conversation_id)
+        
+        async def generate_stream() -> AsyncIterator[Tuple[bytes, bool]]:
             try:
-                async for chunk in workflow.stream_process_message(
+                async for node_name, node_data in workflow.stream_process_message(
                     user_input=request.message,
                     conversation_id=request.conversation_id or "default",
-                    user_id=request.user_id or "default"
+                    user_id=request.user_id or "default",
+                    stream_tokens=request.stream_type == "all"
                 ):
-                    # Format the chunk for SSE
-                    if isinstance(chunk, dict):
-                        if "error" in chunk:
-                            stream_response = StreamResponse(
-                                type="error",
-                                content=chunk["error"],
-                                conversation_id=request.conversation_id
-                            )
-                        else:
-                            # Extract the current node and its output
-                            node_name = list(chunk.keys())[0] if chunk else "unknown"
-                            node_data = chunk.get(node_name, {})
-                            
-                            # Determine the content type
-                            if "messages" in node_data:
-                                messages = node_data["messages"]
-                                if messages and isinstance(messages[-1], dict):
-                                    content = messages[-1].get("content", "")
-                                    stream_response = StreamResponse(
-                                        type="message",
-                                        content=content,
-                                        conversation_id=request.conversation_id,
-                                        metadata={
-                                            "node": node_name,
-                                            "status": node_data.get("workflow_status", "processing")
-                                        }
-                                    )
-                                else:
-                                    continue
-                            else:
-                                stream_response = StreamResponse(
-                                    type="status",
-                                    content=f"Processing with {node_name}...",
-                                    conversation_id=request.conversation_id,
-                                    metadata={"node": node_name}
-                                )
-                        
-                        # Send the formatted response
-                        yield f"data: {stream_response.model_dump_json()}\n\n"
+                    # Format the update for SSE
+                    if node_name == "token":
+                        yield sse_frame("token", node_data), False
+                    elif node_name == "error":
+                        yield sse_frame("error", node_data), False
+                    elif "messages" in node_data:
+                        messages = node_data["messages"]
+                        if messages:
+                            content = getattr(messages[-1], "content", "")
+                            yield sse_frame("message", content, {
+                                "node": node_name,
+                                "status": node_data.get("workflow_status", "processing")
+                            }), False
+                    else:
+                        # Status updates may share a write with what follows
+                        yield sse_frame(
+                            "status",
+                            f"Processing with {node_name}...",
+                            {"node": node_name}
+                        ), True
                 
                 # Send completion signal
-                completion_response = StreamResponse(
-                    type="complete",
-                    content="",
-                    conversation_id=request.conversation_id
-                )
-                yield f"data: {completion_response.model_dump_json()}\n\n"
+                yield sse_frame("complete", ""), False
                 
             except Exception as e:
-                logger.error(f"Stream generation error: {e}", exc_info=True)
-                error_response = StreamResponse(
-                    type="error",
-                    content=str(e),
-                    conversation_id=request.conversation_id
-                )
-                yield f"data: {error_response.model_dump_json()}\n\n"
+                logger.error(f"Stream generation error: {e}")
+                yield sse_frame("error", str(e)), False
         
         return StreamingResponse(
-            generate_stream(),
+            with_keepalive(coalesce_frames(generate_stream())),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
                 "Access-Control-Allow-Origin": "*",
+                # Flush every frame: no proxy buffering, no compression
+                "X-Accel-Buffering": "no",
+                "Content-Encoding": "identity",
             }
         )
         
     except Exception as e:
-        logger.error(f"Stream chat error: {e}", exc_info=True)
+        logger.error(f"Stream chat error: {e}", exc_info=get_settings().debug)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/chat/history/{conversation_id}")
@@ -144,24 +259,43 @@ async def get_chat_history(conversation_id: str):
     """
     Get chat history for a specific conversation.
     
-    Note: This is a placeholder. In a real application, you would
-    retrieve this from a database or the workflow's memory system.
+    Reads the same stored messages as /chat/{conversation_id}/messages;
+    timestamps are not tracked by the workflow's memory, so they stay None.
     """
     try:
-        # This would typically fetch from a database
-        # For now, return a placeholder response
+        messages = await workflow.get_messages(conversation_id)
         return {
             "conversation_id": conversation_id,
-            "messages": [],
+            "messages": messages,
             "metadata": {
                 "created_at": None,
                 "last_updated": None,
-                "message_count": 0
+                "message_count": len(messages)
             }
         }
         
     except Exception as e:
-        logger.error(f"Error fetching chat history: {e}", exc_info=True)
+        logger.error(f"Error fetching chat history: {e}", exc_info=get_settings().debug)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/chat/{conversation_id}/messages")
+async def get_conversation_messages(conversation_id: str, since: int = Query(0, ge=0)):
+    """
+    Get the stored messages of a conversation.
+    
+    The backend's conversation memory is the source of truth; clients keep
+    a short window and ask only for the messages from index since onwards.
+    """
+    try:
+        messages = await workflow.get_messages(conversation_id, since)
+        return {
+            "conversation_id": conversation_id,
+            "since": since,
+            "messages": messages
+        }
+        
+    except Exception as e:
+        logger.error(f"Error fetching conversation messages: {e}", exc_info=get_settings().debug)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/chat/{conversation_id}")
@@ -169,13 +303,11 @@ async def delete_conversation(conversation_id: str):
     """
     Delete a conversation and its history.
     
-    Note: This is a placeholder. In a real application, you would
-    delete from a database and clear the workflow's memory.
+    Clears the workflow's in-memory checkpoints for the conversation.
     """
     try:
-        # This would typically delete from a database
-        # and clear memory checkpoints
         logger.info(f"Deleting conversation: {conversation_id}")
+        workflow.forget_conversation(conversation_id)
         
         return {
             "message": f"Conversation {conversation_id} deleted successfully",
@@ -183,5 +315,5 @@ async def delete_conversation(conversation_id: str):
         }
         
     except Exception as e:
-        logger.error(f"Error deleting conversation: {e}", exc_info=True)
+        logger.error(f"Error deleting conversation: {e}", exc_info=get_settings().debug)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -2,12 +2,10 @@
 Configuration settings for the AI Agent application.
 """
 import os
+from functools import lru_cache
 from typing import Optional, List
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
 class Settings:
     """Application settings loaded from environment variables."""
     
@@ -27,6 +25,10 @@ class Settings:
         # FastAPI
         self.fastapi_host: str = os.getenv("FASTAPI_HOST", "0.0.0.0")
         self.fastapi_port: int = int(os.getenv("FASTAPI_PORT", "8000"))
+        # Each worker keeps its own in-memory conversation state, so default to one
+        self.fastapi_workers: int = int(os.getenv("FASTAPI_WORKERS", "1"))
+        self.fastapi_backlog: int = int(os.getenv("FASTAPI_BACKLOG", "2048"))
+        self.fastapi_keep_alive: int = int(os.getenv("FASTAPI_KEEP_ALIVE", "30"))
         
         # Streamlit
         self.streamlit_host: str = os.getenv("STREAMLIT_HOST", "0.0.0.0")
@@ -35,6 +37,20 @@ class Settings:
         # Database
         self.database_url: str = os.getenv("DATABASE_URL", "sqlite:///./ai_agent.db")
         
+        # Caching of LLM and tool results
+        self.cache_max_entries: int = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+        self.cache_ttl_seconds: float = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+        
+        # Conversation memory
+        self.max_conversations: int = int(os.getenv("MAX_CONVERSATIONS", "10000"))
+        
+        # Thread pool for blocking tool work
+        self.tool_workers: int = int(os.getenv("TOOL_WORKERS", "4"))
+        self.tool_timeout_seconds: float = float(os.getenv("TOOL_TIMEOUT_SECONDS", "10"))
+        
+        # Directory the file handler tool may write into
+        self.file_sandbox_dir: str = os.getenv("FILE_SANDBOX_DIR", "./data/files")
+        
         # Optional APIs
         self.tavily_api_key: Optional[str] = os.getenv("TAVILY_API_KEY")
         self.serpapi_key: Optional[str] = os.getenv("SERPAPI_KEY")
@@ -52,5 +68,8 @@ class Settings:
             self.azure_openai_deployment_name
         )
 
-# Global settings instance
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load the .env file and build the settings once per process."""
+    load_dotenv()
+    return Settings()
@@ -0,0 +1,45 @@
+"""
+Shared thread pool for CPU-bound or blocking tool work.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+import asyncio
+import logging
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Get the process-wide tool thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().tool_workers,
+            thread_name_prefix="tool"
+        )
+        logger.info("Tool thread pool created")
+    return _executor
+
+async def run_blocking(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run func(*args) on the tool pool without blocking the event loop.
+    
+    Raises asyncio.TimeoutError after the configured tool timeout; the
+    worker thread itself cannot be interrupted and finishes in the background.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_tool_executor(), func, *args)
+    return await asyncio.wait_for(future, timeout=get_settings().tool_timeout_seconds)
+
+def shutdown_tool_executor() -> None:
+    """Shut down the tool thread pool without waiting for running work."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Tool thread pool shut down")
+    _executor = None
@@ -0,0 +1,45 @@
+"""
+Shared HTTP client for outbound tool and API calls.
+"""
+from typing import Optional
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Connection pool sizing shared by every tool invocation
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=200)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+# HTTP/2 lets concurrent requests to one host share a single TLS connection
+HTTP2_ENABLED = True
+
+_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide async HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(http2=HTTP2_ENABLED, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        logger.info("Shared HTTP client created")
+    return _client
+
+def get_sync_http_client() -> httpx.Client:
+    """Get the process-wide sync HTTP client for tools called outside the event loop."""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(http2=HTTP2_ENABLED, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        logger.info("Shared sync HTTP client created")
+    return _sync_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP clients and release pooled connections."""
+    global _client, _sync_client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Shared HTTP client closed")
+    if _sync_client is not None and not _sync_client.is_closed:
+        _sync_client.close()
+        logger.info("Shared sync HTTP client closed")
+    _client = None
+    _sync_client = None
@@ -1,37 +1,56 @@
 """
 LLM initialization and configuration for Azure OpenAI.
 """
+from typing import Dict, Optional, Tuple
+import httpx
 from langchain_openai import AzureChatOpenAI
 from langchain_core.language_models.chat_models import BaseChatModel
-from app.core.config import settings
+from app.core.config import get_settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive pool shared by every Azure OpenAI client
+LLM_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+
 class LLMManager:
     """Manages LLM instances and configurations."""
     
     def __init__(self):
         self._llm: BaseChatModel = None
+        # One client per (temperature, streaming) so connections and TLS sessions are reused
+        self._cache: Dict[Tuple[float, bool], BaseChatModel] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
         self._initialize_llm()
     
     def _initialize_llm(self) -> None:
         """Initialize Azure OpenAI LLM instance."""
         try:
-            self._llm = AzureChatOpenAI(
+            self._llm = self._get_llm(temperature=0.1, streaming=True)
+            logger.info("Azure OpenAI LLM initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize Azure OpenAI LLM: {e}")
+            raise
+    
+    def _get_llm(self, temperature: float, streaming: bool) -> BaseChatModel:
+        """Get the cached LLM for these options, creating it on first use."""
+        key = (round(temperature, 3), streaming)
+        if key not in self._cache:
+            if self._http_client is None:
+                self._http_client = httpx.AsyncClient(http2=True, limits=LLM_HTTP_LIMITS)
+            settings = get_settings()
+            self._cache[key] = AzureChatOpenAI(
                 api_key=settings.azure_openai_api_key,
                 azure_endpoint=settings.azure_openai_endpoint,
                 api_version=settings.azure_openai_api_version,
                 azure_deployment=settings.azure_openai_deployment_name,
-                temperature=0.1,
+                temperature=temperature,
                 max_tokens=4000,
-                streaming=True,
-                verbose=settings.debug
+                streaming=streaming,
+                verbose=settings.debug,
+                http_async_client=self._http_client
             )
-            logger.info("Azure OpenAI LLM initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Azure OpenAI LLM: {e}")
-            raise
+        return self._cache[key]
     
     @property
     def llm(self) -> BaseChatModel:
@@ -42,29 +61,25 @@ class LLMManager:
     
     def get_streaming_llm(self, temperature: float = 0.1) -> BaseChatModel:
         """Get a streaming LLM with custom temperature."""
-        return AzureChatOpenAI(
-            api_key=settings.azure_openai_api_key,
-            azure_endpoint=settings.azure_openai_endpoint,
-            api_version=settings.azure_openai_api_version,
-            azure_deployment=settings.azure_openai_deployment_name,
-            temperature=temperature,
-            max_tokens=4000,
-            streaming=True,
-            verbose=settings.debug
-        )
+        return self._get_llm(temperature, streaming=True)
     
     def get_non_streaming_llm(self, temperature: float = 0.1) -> BaseChatModel:
         """Get a non-streaming LLM with custom temperature."""
-        return AzureChatOpenAI(
-            api_key=settings.azure_openai_api_key,
-            azure_endpoint=settings.azure_openai_endpoint,
-            api_version=settings.azure_openai_api_version,
-            azure_deployment=settings.azure_openai_deployment_name,
-            temperature=temperature,
-            max_tokens=4000,
-            streaming=False,
-            verbose=settings.debug
-        )
+        return self._get_llm(temperature, streaming=False)
+    
+    async def aclose(self) -> None:
+        """
+        Close the shared HTTP client and drop the cached models.
+        
+        Models are rebuilt on a fresh client when next requested; agents
+        look their model up through the manager, so they follow along.
+        """
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            logger.info("LLM HTTP client closed")
+        self._http_client = None
+        self._cache.clear()
+        self._llm = None
 
 # Global LLM manager instance
 llm_manager = LLMManager()
\ No newline at end of file
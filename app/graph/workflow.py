@@ -1,24 +1,88 @@
 """
 LangGraph workflow definition for the AI agent system.
 """
-from typing import Dict, Any, Literal
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, List, Literal, Tuple
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 from app.graph.state import AgentState
 from app.agents.research_agent import ResearchAgent
-from app.agents.supervisor_agent import SupervisorAgent
+from app.agents.supervisor_agent import SupervisorAgent, FAST_PATH_CONFIDENCE_THRESHOLD
+from app.core.cache import create_cache, make_cache_key
+from app.core.config import get_settings
 from app.core.llm import llm_manager
 import logging
 
 logger = logging.getLogger(__name__)
 
+DIRECT_RESPONSE_SYSTEM_PROMPT = "You are a helpful AI assistant. Provide clear, accurate, and helpful responses."
+# Built once so every direct answer starts with the identical prompt prefix
+DIRECT_RESPONSE_SYSTEM_MESSAGE = SystemMessage(content=DIRECT_RESPONSE_SYSTEM_PROMPT)
+
+# Fields every run starts from; mutable fields are filled in fresh per run
+_INITIAL_STATE_TEMPLATE: Dict[str, Any] = {
+    "messages": None,
+    "user_input": "",
+    "next_action": None,
+    "research_data": None,
+    "plan": None,
+    "tools_used": None,
+    "tool_results": None,
+    "conversation_id": None,
+    "user_id": None,
+    "current_agent": "supervisor",
+    "workflow_status": "in_progress",
+    "working_memory": None,
+    "long_term_memory": None,
+    "timestamp": None,
+    "session_data": None
+}
+
+class _LRUMemorySaver(MemorySaver):
+    """MemorySaver that forgets the least recently used conversations past a limit."""
+    
+    def __init__(self, max_threads: int):
+        super().__init__()
+        self.max_threads = max_threads
+        self._threads: "OrderedDict[str, None]" = OrderedDict()
+    
+    def put(self, config, checkpoint, metadata, new_versions):
+        """Save a checkpoint, then evict the oldest threads if over the limit."""
+        result = super().put(config, checkpoint, metadata, new_versions)
+        
+        thread_id = config["configurable"]["thread_id"]
+        self._threads[thread_id] = None
+        self._threads.move_to_end(thread_id)
+        while len(self._threads) > self.max_threads:
+            oldest, _ = self._threads.popitem(last=False)
+            self._forget_thread(oldest)
+        return result
+    
+    def forget(self, thread_id: str) -> None:
+        """Drop a conversation on request."""
+        self._threads.pop(thread_id, None)
+        self._forget_thread(thread_id)
+    
+    def _forget_thread(self, thread_id: str) -> None:
+        """Drop all checkpoints, pending writes and blobs stored for a thread."""
+        self.storage.pop(thread_id, None)
+        for store in (self.writes, getattr(self, "blobs", {})):
+            for key in [key for key in store if key[0] == thread_id]:
+                del store[key]
+        logger.info(f"Dropped conversation memory for thread: {thread_id}")
+
 class AgentWorkflow:
     """Main workflow orchestrator using LangGraph."""
     
     def __init__(self):
         self.research_agent = ResearchAgent()
         self.supervisor_agent = SupervisorAgent()
-        self.memory = MemorySaver()
+        self.memory = _LRUMemorySaver(get_settings().max_conversations)
+        # Direct (non-research) answers depend only on the user input
+        self.response_cache = create_cache()
         self.graph = self._build_graph()
     
     def _build_graph(self) -> StateGraph:
@@ -60,35 +124,88 @@ class AgentWorkflow:
         # Compile the graph with memory
         return workflow.compile(checkpointer=self.memory)
     
-    async def _supervisor_node(self, state: AgentState) -> AgentState:
+    async def _supervisor_node(self, state: AgentState, config: RunnableConfig) -> AgentState:
         """Supervisor node that decides the next action."""
         try:
             logger.info("Supervisor node activated")
+            if self._should_prefetch_research(state, config):
+                return await self._decide_with_prefetched_research(state)
             return await self.supervisor_agent.decide_action(state)
         except Exception as e:
             logger.error(f"Supervisor node error: {e}")
             state["workflow_status"] = "error"
-            state["messages"].append({
-                "role": "assistant",
-                "content": f"Supervisor error: {str(e)}"
-            })
+            state["messages"].append(AIMessage(content=f"Supervisor error: {str(e)}"))
+            return state
+    
+    def _should_prefetch_research(self, state: AgentState, config: RunnableConfig) -> bool:
+        """
+        Decide whether to start research before the supervisor has decided.
+        
+        Only worthwhile when the rules lean towards research but are not
+        confident enough to skip the supervisor's LLM call. Token streaming
+        runs research in its own node so tokens are never sent for discarded work.
+        """
+        if config.get("configurable", {}).get("token_sink") is not None:
+            return False
+        
+        decision, confidence = self.supervisor_agent.fast_classify(state.get("user_input", ""))
+        return decision == "research" and confidence < FAST_PATH_CONFIDENCE_THRESHOLD
+    
+    async def _decide_with_prefetched_research(self, state: AgentState) -> AgentState:
+        """Run the supervisor decision and a speculative research pass concurrently."""
+        # The speculative run gets its own containers so a discarded run leaves no trace
+        speculative_state = {
+            **state,
+            "messages": list(state["messages"]),
+            "tools_used": list(state["tools_used"]),
+            "working_memory": dict(state["working_memory"])
+        }
+        research_task = asyncio.create_task(self.research_agent.research(speculative_state))
+        
+        try:
+            state = await self.supervisor_agent.decide_action(state)
+        except BaseException:
+            research_task.cancel()
+            raise
+        
+        if state.get("next_action") != "research":
+            logger.info("Discarding speculative research")
+            research_task.cancel()
             return state
+        
+        speculative_state = await research_task
+        state["research_data"] = speculative_state["research_data"]
+        state["messages"] = speculative_state["messages"]
+        state["tools_used"] = speculative_state["tools_used"]
+        if speculative_state["workflow_status"] == "error":
+            state["workflow_status"] = "error"
+        state["working_memory"]["research_prefetched"] = True
+        return state
     
-    async def _research_node(self, state: AgentState) -> AgentState:
+    async def _research_node(self, state: AgentState, config: RunnableConfig) -> AgentState:
         """Research node for information gathering."""
         try:
             logger.info("Research node activated")
-            return await self.research_agent.research(state)
+            
+            # Research already ran alongside the supervisor decision
+            if state["working_memory"].pop("research_prefetched", False):
+                return state
+            
+            # Forward synthesis tokens when the caller asked for token streaming
+            token_sink = config.get("configurable", {}).get("token_sink")
+            if token_sink is None:
+                return await self.research_agent.research(state)
+            
+            async for token in self.research_agent.research_stream(state):
+                token_sink(token)
+            return state
         except Exception as e:
             logger.error(f"Research node error: {e}")
             state["workflow_status"] = "error"
-            state["messages"].append({
-                "role": "assistant", 
-                "content": f"Research error: {str(e)}"
-            })
+            state["messages"].append(AIMessage(content=f"Research error: {str(e)}"))
             return state
     
-    async def _respond_node(self, state: AgentState) -> AgentState:
+    async def _respond_node(self, state: AgentState, config: RunnableConfig) -> AgentState:
         """Final response node."""
         try:
             logger.info("Response node activated")
@@ -97,25 +214,25 @@ class AgentWorkflow:
             if state.get("research_data"):
                 # Use research data to generate response
                 synthesis = state["research_data"].get("synthesis", "")
-                if synthesis:
-                    state["messages"].append({
-                        "role": "assistant",
-                        "content": synthesis
-                    })
+                # The research agent normally records the synthesis already
+                last = state["messages"][-1] if state["messages"] else None
+                if synthesis and not (isinstance(last, AIMessage) and last.content == synthesis):
+                    state["messages"].append(AIMessage(content=synthesis))
             else:
                 # Generate direct response
-                llm = llm_manager.llm
-                user_input = state.get("user_input", "")
-                
-                response = await llm.ainvoke([
-                    {"role": "system", "content": "You are a helpful AI assistant. Provide clear, accurate, and helpful responses."},
-                    {"role": "user", "content": user_input}
-                ])
+                use_cache = config.get("configurable", {}).get("use_response_cache", True)
+                token_sink = config.get("configurable", {}).get("token_sink")
+                if token_sink is None:
+                    content = await self._direct_respond(state.get("user_input", ""), use_cache)
+                else:
+                    # Forward answer tokens when the caller asked for token streaming
+                    chunks = []
+                    async for token in self._stream_direct_respond(state.get("user_input", ""), use_cache):
+                        chunks.append(token)
+                        token_sink(token)
+                    content = "".join(chunks)
                 
-                state["messages"].append({
-                    "role": "assistant",
-                    "content": response.content
-                })
+                state["messages"].append(AIMessage(content=content))
             
             state["workflow_status"] = "completed"
             state["current_agent"] = "respond"
@@ -126,12 +243,47 @@ class AgentWorkflow:
         except Exception as e:
             logger.error(f"Response node error: {e}")
             state["workflow_status"] = "error"
-            state["messages"].append({
-                "role": "assistant",
-                "content": f"Response generation error: {str(e)}"
-            })
+            state["messages"].append(AIMessage(content=f"Response generation error: {str(e)}"))
             return state
     
+    async def _direct_respond(self, user_input: str, use_cache: bool = True) -> str:
+        """Answer without research, reusing the cached answer for a repeated input."""
+        cache_key = make_cache_key(DIRECT_RESPONSE_SYSTEM_PROMPT, user_input)
+        if use_cache:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached direct response")
+                return cached
+        
+        response = await llm_manager.llm.ainvoke([
+            DIRECT_RESPONSE_SYSTEM_MESSAGE,
+            HumanMessage(content=user_input)
+        ])
+        
+        self.response_cache.set(cache_key, response.content)
+        return response.content
+    
+    async def _stream_direct_respond(self, user_input: str, use_cache: bool = True) -> AsyncIterator[str]:
+        """Streaming counterpart of _direct_respond; a cached answer is yielded whole."""
+        cache_key = make_cache_key(DIRECT_RESPONSE_SYSTEM_PROMPT, user_input)
+        if use_cache:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached direct response")
+                yield cached
+                return
+        
+        chunks = []
+        async for chunk in llm_manager.llm.astream([
+            DIRECT_RESPONSE_SYSTEM_MESSAGE,
+            HumanMessage(content=user_input)
+        ]):
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+        
+        self.response_cache.set(cache_key, "".join(chunks))
+    
     def _route_supervisor(self, state: AgentState) -> Literal["research", "respond", "end"]:
         """Route after supervisor decision."""
         next_action = state.get("next_action", "respond")
@@ -149,33 +301,37 @@ class AgentWorkflow:
             return "end"
         return "respond"
     
-    async def process_message(self, user_input: str, conversation_id: str = "default", user_id: str = "default") -> Dict[str, Any]:
+    def _initial_state(self, user_input: str, conversation_id: str, user_id: str) -> AgentState:
+        """Build the starting state for a run from the shared template."""
+        state = _INITIAL_STATE_TEMPLATE.copy()
+        state["messages"] = [HumanMessage(content=user_input)]
+        state["user_input"] = user_input
+        state["conversation_id"] = conversation_id
+        state["user_id"] = user_id
+        state["tools_used"] = []
+        state["tool_results"] = {}
+        state["working_memory"] = {}
+        state["session_data"] = {}
+        return state
+    
+    async def process_message(
+        self,
+        user_input: str,
+        conversation_id: str = "default",
+        user_id: str = "default",
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
         """Process a user message through the workflow."""
         try:
             # Initialize state
-            initial_state = AgentState(
-                messages=[{"role": "user", "content": user_input}],
-                user_input=user_input,
-                next_action=None,
-                research_data=None,
-                plan=None,
-                tools_used=[],
-                tool_results={},
-                conversation_id=conversation_id,
-                user_id=user_id,
-                current_agent="supervisor",
-                workflow_status="in_progress",
-                working_memory={},
-                long_term_memory=None,
-                timestamp=None,
-                session_data={}
-            )
+            initial_state = self._initial_state(user_input, conversation_id, user_id)
             
             # Configure the graph run
             config = {
                 "configurable": {
                     "thread_id": conversation_id,
-                    "user_id": user_id
+                    "user_id": user_id,
+                    "use_response_cache": use_cache
                 }
             }
             
@@ -184,10 +340,10 @@ class AgentWorkflow:
             
             # Extract response
             messages = final_state.get("messages", [])
-            latest_message = messages[-1] if messages else {"content": "No response generated"}
+            latest_message = messages[-1] if messages else AIMessage(content="No response generated")
             
             return {
-                "response": latest_message.get("content", ""),
+                "response": latest_message.content,
                 "status": final_state.get("workflow_status", "completed"),
                 "tools_used": final_state.get("tools_used", []),
                 "research_data": final_state.get("research_data"),
@@ -204,27 +360,24 @@ class AgentWorkflow:
                 "conversation_id": conversation_id
             }
     
-    async def stream_process_message(self, user_input: str, conversation_id: str = "default", user_id: str = "default"):
-        """Stream process a user message through the workflow."""
+    async def stream_process_message(
+        self,
+        user_input: str,
+        conversation_id: str = "default",
+        user_id: str = "default",
+        stream_tokens: bool = False
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream process a user message through the workflow.
+        
+        Yields (node_name, node_data) for each graph update. With
+        stream_tokens, research synthesis and direct answer tokens are
+        interleaved as ("token", token) while their node is still running. Failures
+        are reported as ("error", message).
+        """
         try:
             # Initialize state
-            initial_state = AgentState(
-                messages=[{"role": "user", "content": user_input}],
-                user_input=user_input,
-                next_action=None,
-                research_data=None,
-                plan=None,
-                tools_used=[],
-                tool_results={},
-                conversation_id=conversation_id,
-                user_id=user_id,
-                current_agent="supervisor",
-                workflow_status="in_progress",
-                working_memory={},
-                long_term_memory=None,
-                timestamp=None,
-                session_data={}
-            )
+            initial_state = self._initial_state(user_input, conversation_id, user_id)
             
             # Configure the graph run
             config = {
@@ -234,13 +387,60 @@ class AgentWorkflow:
                 }
             }
             
-            # Stream the graph execution
-            async for chunk in self.graph.astream(initial_state, config):
-                yield chunk
+            if not stream_tokens:
+                # Stream the graph execution
+                # Close the graph stream even if the consumer stops early
+                stream = self.graph.astream(initial_state, config)
+                try:
+                    async for chunk in stream:
+                        yield next(iter(chunk.items()))
+                finally:
+                    await stream.aclose()
+                return
+            
+            # Multiplex graph updates and synthesis tokens through one queue
+            queue: asyncio.Queue = asyncio.Queue()
+            finished = object()
+            config["configurable"]["token_sink"] = lambda token: queue.put_nowait(("token", token))
+            
+            async def run_graph() -> None:
+                stream = self.graph.astream(initial_state, config)
+                try:
+                    async for chunk in stream:
+                        queue.put_nowait(next(iter(chunk.items())))
+                except Exception as e:
+                    logger.error(f"Workflow streaming error: {e}")
+                    queue.put_nowait(("error", str(e)))
+                finally:
+                    await stream.aclose()
+                    queue.put_nowait(finished)
+            
+            graph_task = asyncio.create_task(run_graph())
+            try:
+                while (item := await queue.get()) is not finished:
+                    yield item
+            finally:
+                graph_task.cancel()
                 
         except Exception as e:
             logger.error(f"Workflow streaming error: {e}")
-            yield {"error": str(e)}
+            yield "error", str(e)
+
+    async def get_messages(self, conversation_id: str, since: int = 0) -> List[Dict[str, str]]:
+        """Return a conversation's stored messages from index since onwards."""
+        snapshot = await self.graph.aget_state({"configurable": {"thread_id": conversation_id}})
+        messages = snapshot.values.get("messages", []) if snapshot else []
+        return [
+            {
+                "role": "user" if isinstance(message, HumanMessage) else "assistant",
+                "content": message.content
+            }
+            for message in messages[since:]
+        ]
+    
+    def forget_conversation(self, conversation_id: str) -> None:
+        """Drop a conversation's stored state."""
+        self.memory.forget(conversation_id)
 
 # Global workflow instance
 workflow = AgentWorkflow()
\ No newline at end of file
@@ -1,23 +1,90 @@
 # ai_agent_project/app/tools/calculator.py
 
+import ast
+import asyncio
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, Type, Union
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
+from app.core.executor import run_blocking
+
+Number = Union[int, float, complex]
+
+# Whitelisted operators; anything else in the expression is rejected
+_BINARY_OPS: Dict[Type[ast.operator], Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS: Dict[Type[ast.unaryop], Callable[[Any], Any]] = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+# Keeps expressions like 9 ** 9 ** 9 from pinning the CPU
+MAX_EXPONENT = 1000
+# Bounds integer results too, so nested powers such as (9 ** 999) ** 999 are refused up front
+MAX_RESULT_BITS = 10_000
+
+@lru_cache(maxsize=1024)
+def _compile(expression: str) -> ast.expr:
+    """Parse an expression once; repeated expressions reuse the tree."""
+    return ast.parse(expression.strip(), mode="eval").body
+
+def _check_result_size(op: ast.operator, left: Number, right: Number) -> None:
+    """Reject integer powers and products whose result would exceed MAX_RESULT_BITS."""
+    if type(left) is not int or type(right) is not int:
+        return
+    if isinstance(op, ast.Pow) and right > 0:
+        bits = left.bit_length() * right
+    elif isinstance(op, ast.Mult):
+        bits = left.bit_length() + right.bit_length()
+    else:
+        return
+    if bits > MAX_RESULT_BITS:
+        raise ValueError(f"result would exceed the limit of {MAX_RESULT_BITS} bits")
+
+def _eval(node: ast.expr) -> Number:
+    """Evaluate a parsed expression using only the whitelisted operators."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float, complex):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        left, right = _eval(node.left), _eval(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > MAX_EXPONENT:
+            raise ValueError(f"exponent {right} exceeds the limit of {MAX_EXPONENT}")
+        _check_result_size(node.op, left, right)
+        return _BINARY_OPS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_eval(node.operand))
+    raise ValueError(f"unsupported expression element: {type(node).__name__}")
+
+def evaluate(expression: str) -> Number:
+    """Safely evaluate an arithmetic expression."""
+    return _eval(_compile(expression))
 
 class CalculatorInput(BaseModel):
     expression: str = Field(..., description="Mathematical expression to evaluate")
 
 class CalculatorTool(BaseTool):
-    name = "calculator"
-    description = "Evaluate a mathematical expression"
+    name: str = "calculator"
+    description: str = "Evaluate a mathematical expression"
 
-    args_schema = CalculatorInput
+    args_schema: type[BaseModel] = CalculatorInput
 
     def _run(self, expression: str) -> str:
         try:
-            result = eval(expression, {}, {})
-            return str(result)
+            return str(evaluate(expression))
         except Exception as e:
             return f"Error: {e}"
 
     async def _arun(self, expression: str) -> str:
-        return self._run(expression)
+        # Large operands can take a while; keep them off the event loop
+        try:
+            return await run_blocking(self._run, expression)
+        except asyncio.TimeoutError:
+            return "Error: calculation timed out"
@@ -1,23 +1,57 @@
 # ai_agent_project/app/tools/file_handler.py
 
 import os
+from typing import Optional
+import aiofiles
+import aiofiles.os
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
+from app.core.config import get_settings
+
+SANDBOX_ERROR = "Error: path outside sandbox"
+
+def _sandbox_path(filename: str) -> Optional[str]:
+    """Resolve filename inside the sandbox directory, or None if it escapes it."""
+    base = os.path.realpath(get_settings().file_sandbox_dir)
+    full = os.path.realpath(os.path.join(base, filename))
+    if not full.startswith(base + os.sep):
+        return None
+    return full
 
 class FileHandlerInput(BaseModel):
     filename: str = Field(..., description="Name of the file")
     content: str = Field(..., description="Content to write")
 
 class FileHandlerTool(BaseTool):
-    name = "file_handler"
-    description = "Read/write files on the server"
+    name: str = "file_handler"
+    description: str = "Read/write files on the server"
 
-    args_schema = FileHandlerInput
+    args_schema: type[BaseModel] = FileHandlerInput
 
     def _run(self, filename: str, content: str) -> str:
-        with open(filename, "w") as f:
-            f.write(content)
+        path = _sandbox_path(filename)
+        if path is None:
+            return SANDBOX_ERROR
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Unbuffered write straight to the descriptor
+        data = memoryview(content.encode())
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
         return f"File {filename} saved."
 
     async def _arun(self, filename: str, content: str) -> str:
-        return self._run(filename, content)
+        path = _sandbox_path(filename)
+        if path is None:
+            return SANDBOX_ERROR
+        await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write without blocking the event loop that serves concurrent streams;
+        # UTF-8 without newline translation, the same bytes _run writes
+        async with aiofiles.open(path, "w", encoding="utf-8", newline="") as f:
+            await f.write(content)
+        return f"File {filename} saved."
@@ -1,16 +1,81 @@
 """
 Web search tool for the AI agent.
 """
+import asyncio
 import json
+import threading
 import httpx
-from typing import Dict, Any, Optional, List
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Optional, List, Tuple
+from urllib.parse import parse_qs, urlparse
+from bs4 import BeautifulSoup
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
-from app.core.config import settings
+from app.core.cache import LRUCache, SingleFlight
+from app.core.config import get_settings
+from app.core.executor import run_blocking
+from app.core.http import get_http_client, get_sync_http_client
 import logging
 
 logger = logging.getLogger(__name__)
 
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+DUCKDUCKGO_HTML_URL = "https://html.duckduckgo.com/html/"
+DUCKDUCKGO_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; FluxAgent/1.0)"}
+
+class SearchFailure(str):
+    """A message returned instead of search results; callers must not cache it."""
+
+# Upper bound on searches in flight from one multi_search call
+MAX_CONCURRENT_SEARCHES = 10
+
+# Recent search results, shared by every tool instance. The sync paths run
+# on worker threads, so cache access is locked.
+SEARCH_CACHE_TTL_SECONDS = 300
+_search_cache = LRUCache(maxsize=512, ttl=SEARCH_CACHE_TTL_SECONDS)
+_search_cache_lock = threading.Lock()
+_search_inflight = SingleFlight()
+
+def _get_cached_search(key: Tuple[str, str, int]) -> Optional[str]:
+    """Return a cached search result, or None."""
+    with _search_cache_lock:
+        return _search_cache.get(key)
+
+def _cache_search(key: Tuple[str, str, int], result: str) -> None:
+    """Remember a successful search result."""
+    with _search_cache_lock:
+        _search_cache.set(key, result)
+
+def _format_web_results(results: Iterable[Tuple[str, str, str]]) -> Optional[str]:
+    """Format (title, snippet, link) results for the agent, or None if there are none."""
+    parts = ["Web Search Results:\n\n"]
+    parts.extend(
+        f"{i}. **{title}**\n"
+        f"   {snippet}\n"
+        f"   Source: {link}\n\n"
+        for i, (title, snippet, link) in enumerate(results, 1)
+    )
+    return "".join(parts) if len(parts) > 1 else None
+
+def _parse_duckduckgo_html(html: str, max_results: int) -> List[Tuple[str, str, str]]:
+    """Extract (title, snippet, link) from DuckDuckGo's HTML results page."""
+    results = []
+    for node in BeautifulSoup(html, "html.parser").select("div.result")[:max_results]:
+        anchor = node.select_one("a.result__a")
+        if anchor is None:
+            continue
+        
+        # Result links go through a redirect that carries the target in "uddg"
+        link = anchor.get("href", "")
+        link = parse_qs(urlparse(link).query).get("uddg", [link])[0]
+        snippet = node.select_one(".result__snippet")
+        results.append((
+            anchor.get_text(" ", strip=True),
+            snippet.get_text(" ", strip=True) if snippet else "",
+            link
+        ))
+    return results
+
 class WebSearchInput(BaseModel):
     """Input schema for web search tool."""
     query: str = Field(description="Search query to find information on the web")
@@ -26,6 +91,9 @@ class WebSearchTool(BaseTool):
     """
     args_schema: type[BaseModel] = WebSearchInput
     
+    # Optional client override; the shared pooled client is used otherwise
+    client: Optional[httpx.AsyncClient] = None
+    
     def _run(self, query: str, max_results: int = 5) -> str:
         """Execute the web search."""
         try:
@@ -33,47 +101,74 @@ class WebSearchTool(BaseTool):
             return self._duckduckgo_search(query, max_results)
         except Exception as e:
             logger.error(f"Web search failed: {e}")
-            return f"Web search failed: {str(e)}"
+            return SearchFailure(f"Web search failed: {str(e)}")
     
     async def _arun(self, query: str, max_results: int = 5) -> str:
-        """Async version of the web search."""
-        return self._run(query, max_results)
+        """
+        Async version of the web search.
+        
+        Queries DuckDuckGo's HTML endpoint on the shared async client; if that
+        fails or yields nothing, the blocking DDGS search runs on the tool pool.
+        """
+        cache_key = ("duckduckgo", query, max_results)
+        cached = _get_cached_search(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            formatted_results = await self._duckduckgo_html_search(query, max_results)
+            if formatted_results is not None:
+                _cache_search(cache_key, formatted_results)
+                return formatted_results
+        except Exception as e:
+            logger.warning(f"DuckDuckGo HTML search failed, falling back to DDGS: {e}")
+        
+        try:
+            return await run_blocking(self._run, query, max_results)
+        except asyncio.TimeoutError:
+            logger.error(f"Web search timed out: {query}")
+            return SearchFailure("Web search failed: timed out")
+    
+    async def _duckduckgo_html_search(self, query: str, max_results: int) -> Optional[str]:
+        """Search DuckDuckGo's HTML endpoint without leaving the event loop."""
+        client = self.client or get_http_client()
+        response = await client.get(DUCKDUCKGO_HTML_URL, params={"q": query}, headers=DUCKDUCKGO_HEADERS)
+        response.raise_for_status()
+        return _format_web_results(_parse_duckduckgo_html(response.text, max_results))
     
     def _duckduckgo_search(self, query: str, max_results: int) -> str:
         """Perform search using DuckDuckGo."""
+        cache_key = ("duckduckgo", query, max_results)
+        cached = _get_cached_search(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             from duckduckgo_search import DDGS
             
-            results = []
+            # Format results for the agent as they arrive
             with DDGS() as ddgs:
-                search_results = list(ddgs.text(query, max_results=max_results))
-                
-                for result in search_results:
-                    results.append({
-                        "title": result.get("title", ""),
-                        "snippet": result.get("body", ""),
-                        "link": result.get("href", "")
-                    })
+                formatted_results = _format_web_results(
+                    (result.get("title", ""), result.get("body", ""), result.get("href", ""))
+                    for result in ddgs.text(query, max_results=max_results)
+                )
             
-            # Format results for the agent
-            formatted_results = "Web Search Results:\n\n"
-            for i, result in enumerate(results, 1):
-                formatted_results += f"{i}. **{result['title']}**\n"
-                formatted_results += f"   {result['snippet']}\n"
-                formatted_results += f"   Source: {result['link']}\n\n"
+            if formatted_results is None:
+                return SearchFailure("No search results found.")
             
-            return formatted_results if results else "No search results found."
+            _cache_search(cache_key, formatted_results)
+            return formatted_results
             
         except ImportError:
             logger.warning("duckduckgo-search not installed, using fallback method")
             return self._fallback_search(query)
         except Exception as e:
             logger.error(f"DuckDuckGo search failed: {e}")
-            return f"Search failed: {str(e)}"
+            return SearchFailure(f"Search failed: {str(e)}")
     
     def _fallback_search(self, query: str) -> str:
         """Fallback search method when DuckDuckGo is not available."""
-        return f"Web search for '{query}' is currently unavailable. Please install the duckduckgo-search package or configure an alternative search API."
+        return SearchFailure(f"Web search for '{query}' is currently unavailable. Please install the duckduckgo-search package or configure an alternative search API.")
 
 class TavilySearchTool(BaseTool):
     """Tool for searching the web using Tavily API."""
@@ -85,62 +180,111 @@ class TavilySearchTool(BaseTool):
     """
     args_schema: type[BaseModel] = WebSearchInput
     
+    # Optional client override; the shared pooled client is used otherwise
+    client: Optional[httpx.AsyncClient] = None
+    
     def _run(self, query: str, max_results: int = 5) -> str:
         """Execute Tavily search."""
-        if not settings.tavily_api_key:
-            return "Tavily API key not configured. Please set TAVILY_API_KEY in your environment."
+        if not get_settings().tavily_api_key:
+            return SearchFailure("Tavily API key not configured. Please set TAVILY_API_KEY in your environment.")
+        
+        cache_key = ("tavily", query, max_results)
+        cached = _get_cached_search(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            url = "https://api.tavily.com/search"
-            headers = {
-                "Content-Type": "application/json"
-            }
-            data = {
-                "api_key": settings.tavily_api_key,
-                "query": query,
-                "search_depth": "advanced",
-                "include_answer": True,
-                "include_raw_content": False,
-                "max_results": max_results
-            }
+            response = get_sync_http_client().post(TAVILY_SEARCH_URL, json=self._build_payload(query, max_results))
+            response.raise_for_status()
             
-            with httpx.Client() as client:
-                response = client.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                
-                result = response.json()
-                return self._format_tavily_results(result)
+            formatted = self._format_tavily_results(response.json())
+            _cache_search(cache_key, formatted)
+            return formatted
                 
         except Exception as e:
             logger.error(f"Tavily search failed: {e}")
-            return f"Tavily search failed: {str(e)}"
+            return SearchFailure(f"Tavily search failed: {str(e)}")
     
     async def _arun(self, query: str, max_results: int = 5) -> str:
-        """Async version of Tavily search."""
-        return self._run(query, max_results)
+        """Async version of Tavily search, reusing pooled connections."""
+        if not get_settings().tavily_api_key:
+            return SearchFailure("Tavily API key not configured. Please set TAVILY_API_KEY in your environment.")
+        
+        cache_key = ("tavily", query, max_results)
+        cached = _get_cached_search(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            # Identical concurrent searches share one upstream request
+            return await _search_inflight.do(cache_key, lambda: self._fetch_tavily(cache_key))
+            
+        except Exception as e:
+            logger.error(f"Tavily search failed: {e}")
+            return SearchFailure(f"Tavily search failed: {str(e)}")
+    
+    async def _fetch_tavily(self, cache_key: Tuple[str, str, int]) -> str:
+        """Query Tavily over the async client and cache the formatted result."""
+        _, query, max_results = cache_key
+        client = self.client or get_http_client()
+        response = await client.post(TAVILY_SEARCH_URL, json=self._build_payload(query, max_results))
+        response.raise_for_status()
+        
+        formatted = self._format_tavily_results(response.json())
+        _cache_search(cache_key, formatted)
+        return formatted
+    
+    def _build_payload(self, query: str, max_results: int) -> Dict[str, Any]:
+        """Build the Tavily search request body."""
+        return {
+            "api_key": get_settings().tavily_api_key,
+            "query": query,
+            "search_depth": "advanced",
+            "include_answer": True,
+            "include_raw_content": False,
+            "max_results": max_results
+        }
     
     def _format_tavily_results(self, result: Dict[str, Any]) -> str:
         """Format Tavily search results."""
-        formatted = "Tavily Search Results:\n\n"
+        parts = ["Tavily Search Results:\n\n"]
         
         # Add answer if available
         if result.get("answer"):
-            formatted += f"**Answer:** {result['answer']}\n\n"
+            parts.append(f"**Answer:** {result['answer']}\n\n")
         
         # Add search results
-        for i, item in enumerate(result.get("results", []), 1):
-            formatted += f"{i}. **{item.get('title', 'No title')}**\n"
-            formatted += f"   {item.get('content', 'No content')}\n"
-            formatted += f"   Source: {item.get('url', 'No URL')}\n\n"
+        parts.extend(
+            f"{i}. **{item.get('title', 'No title')}**\n"
+            f"   {item.get('content', 'No content')}\n"
+            f"   Source: {item.get('url', 'No URL')}\n\n"
+            for i, item in enumerate(result.get("results", []), 1)
+        )
         
-        return formatted
+        return "".join(parts)
 
-def get_web_search_tools() -> List[BaseTool]:
-    """Get available web search tools."""
-    tools = [WebSearchTool()]
+@lru_cache(maxsize=8)
+def _build_web_search_tools(client: Optional[httpx.AsyncClient]) -> Tuple[BaseTool, ...]:
+    """Construct the web search tools once per client."""
+    tools: List[BaseTool] = [WebSearchTool(client=client)]
     
     # Add Tavily if API key is available
-    if settings.tavily_api_key:
-        tools.append(TavilySearchTool())
+    if get_settings().tavily_api_key:
+        tools.append(TavilySearchTool(client=client))
+    
+    return tuple(tools)
+
+def get_web_search_tools(client: Optional[httpx.AsyncClient] = None) -> List[BaseTool]:
+    """Get available web search tools, optionally bound to a specific HTTP client."""
+    # Tool instances are shared; only the returned list is fresh
+    return list(_build_web_search_tools(client))
+
+async def multi_search(queries: List[str], tool: BaseTool, max_results: int = 5) -> List[str]:
+    """Run several searches with one tool concurrently, returning results in query order."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+    
+    async def search(query: str) -> str:
+        async with semaphore:
+            return await tool._arun(query, max_results=max_results)
     
-    return tools
\ No newline at end of file
+    return list(await asyncio.gather(*(search(query) for query in queries)))
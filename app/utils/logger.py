@@ -2,21 +2,32 @@
 Logging configuration for the AI Agent application.
 """
 import logging
+import orjson
 import structlog
 import sys
 from typing import Dict, Any
-from app.core.config import settings
+from app.core.config import get_settings
 
 def setup_logging() -> None:
     """Configure structured logging for the application."""
+    settings = get_settings()
+    min_level = getattr(logging, settings.log_level.upper())
     
     # Configure standard library logging
     logging.basicConfig(
-        level=getattr(logging, settings.log_level.upper()),
+        level=min_level,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         stream=sys.stdout
     )
     
+    # Production logs are rendered by orjson straight to bytes
+    if settings.debug:
+        renderer = structlog.dev.ConsoleRenderer()
+        logger_factory = structlog.WriteLoggerFactory()
+    else:
+        renderer = structlog.processors.JSONRenderer(serializer=orjson.dumps)
+        logger_factory = structlog.BytesLoggerFactory(file=sys.stdout.buffer)
+    
     # Configure structlog
     structlog.configure(
         processors=[
@@ -25,13 +36,11 @@ def setup_logging() -> None:
             structlog.processors.StackInfoRenderer(),
             structlog.dev.set_exc_info,
             structlog.processors.TimeStamper(fmt="ISO"),
-            structlog.dev.ConsoleRenderer() if settings.debug else structlog.processors.JSONRenderer()
+            renderer
         ],
-        wrapper_class=structlog.make_filtering_bound_logger(
-            min_level=getattr(logging, settings.log_level.upper())
-        ),
+        wrapper_class=structlog.make_filtering_bound_logger(min_level=min_level),
         context_class=dict,
-        logger_factory=structlog.WriteLoggerFactory(),
+        logger_factory=logger_factory,
         cache_logger_on_first_use=True
     )
 
@@ -39,9 +48,20 @@ def get_logger(name: str) -> structlog.BoundLogger:
     """Get a structured logger instance."""
     return structlog.get_logger(name)
 
-# Create application-specific loggers
-app_logger = get_logger("ai_agent.app")
-api_logger = get_logger("ai_agent.api")
-agent_logger = get_logger("ai_agent.agents")
-workflow_logger = get_logger("ai_agent.workflow")
-tools_logger = get_logger("ai_agent.tools")
\ No newline at end of file
+# Application-specific loggers, created on first access (after setup_logging)
+_LOGGER_NAMES: Dict[str, str] = {
+    "app_logger": "ai_agent.app",
+    "api_logger": "ai_agent.api",
+    "agent_logger": "ai_agent.agents",
+    "workflow_logger": "ai_agent.workflow",
+    "tools_logger": "ai_agent.tools"
+}
+_loggers: Dict[str, Any] = {}
+
+def __getattr__(name: str) -> Any:
+    """Resolve the application-specific loggers lazily."""
+    if name not in _LOGGER_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name not in _loggers:
+        _loggers[name] = get_logger(_LOGGER_NAMES[name])
+    return _loggers[name]
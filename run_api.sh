@@ -43,4 +43,5 @@ echo "Press Ctrl+C to stop the server"
 echo "=================================="
 
 # Run the server with auto-reload for development
-uvicorn app.api.main:app --host 0.0.0.0 --port 8000 --reload --log-level info
\ No newline at end of file
+uvicorn app.api.main:app --host 0.0.0.0 --port 8000 --reload --log-level info \
+    --loop uvloop --http httptools --timeout-keep-alive 30
\ No newline at end of file
@@ -0,0 +1,27 @@
+# ai_agent_project/tests/conftest.py
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.agents.supervisor_agent import SupervisorAgent
+from app.api.main import app
+
+try:
+    import uvloop
+except ImportError:  # no Windows build
+    uvloop = None
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    # uvloop matches what the server runs on; the session-wide loop scope in
+    # pyproject keeps shared clients and caches bound to one loop
+    return uvloop.EventLoopPolicy() if uvloop else asyncio.DefaultEventLoopPolicy()
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture(scope="session")
+def supervisor():
+    return SupervisorAgent()
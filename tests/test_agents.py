@@ -5,8 +5,7 @@ from app.agents.supervisor_agent import SupervisorAgent
 from app.graph.state import AgentState
 
 @pytest.mark.asyncio
-async def test_supervisor_decision_respond():
-    agent = SupervisorAgent()
+async def test_supervisor_decision_respond(supervisor):
     state = AgentState(
         messages=[],
         user_input="Tell me a joke",
@@ -17,5 +16,187 @@ async def test_supervisor_decision_respond():
         working_memory={}, long_term_memory=None,
         timestamp=None, session_data={}
     )
-    updated = await agent.decide_action(state)
+    updated = await supervisor.decide_action(state)
     assert updated["next_action"] == "respond"
+
+@pytest.mark.asyncio
+async def test_research_tool_calls_run_concurrently():
+    import asyncio
+    from app.agents.research_agent import ResearchAgent
+
+    class SlowTool:
+        def __init__(self, name):
+            self.name = name
+
+        async def _arun(self, query):
+            await asyncio.sleep(0.2)
+            if query == "boom":
+                raise RuntimeError("boom")
+            return f"{self.name}:{query}"
+
+    agent = ResearchAgent()
+    agent.tool_map = {"a": SlowTool("a"), "b": SlowTool("b")}
+    calls = [
+        {"name": "a", "args": {"query": "x"}},
+        {"name": "b", "args": {"query": "boom"}},
+        {"name": "missing", "args": {}},
+    ]
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    results = await agent._execute_tool_calls(calls)
+    assert loop.time() - start < 0.35
+    assert results[0] == {"tool": "a", "query": {"query": "x"}, "result": "a:x"}
+    assert results[1]["error"] == "boom"
+    assert len(results) == 2
+
+@pytest.mark.asyncio
+async def test_failed_tool_results_are_not_cached():
+    from app.agents.research_agent import ResearchAgent
+    from app.tools.web_search import SearchFailure
+
+    class FlakyTool:
+        name = "flaky"
+        calls = 0
+
+        async def _arun(self, query):
+            FlakyTool.calls += 1
+            if FlakyTool.calls == 1:
+                return SearchFailure("Web search failed: timed out")
+            return f"results for {query}"
+
+    agent = ResearchAgent()
+    agent.tool_map = {"flaky": FlakyTool()}
+    calls = [{"name": "flaky", "args": {"query": "x"}}]
+
+    assert (await agent._execute_tool_calls(calls))[0]["result"] == "Web search failed: timed out"
+    assert (await agent._execute_tool_calls(calls))[0]["result"] == "results for x"
+    assert (await agent._execute_tool_calls(calls))[0]["result"] == "results for x"
+    assert FlakyTool.calls == 2
+
+@pytest.mark.asyncio
+async def test_research_synthesis_is_cached():
+    from types import SimpleNamespace
+    from app.agents.research_agent import ResearchAgent
+
+    class CountingLLM:
+        calls = 0
+
+        async def ainvoke(self, messages):
+            CountingLLM.calls += 1
+            return SimpleNamespace(content="summary")
+
+    agent = ResearchAgent()
+    agent.llm = CountingLLM()
+    results = [
+        {"tool": "a", "query": {"query": "x"}, "result": "1"},
+        {"tool": "b", "query": {"query": "y"}, "result": "2"},
+    ]
+    assert await agent._synthesize("q", results) == "summary"
+    assert await agent._synthesize("q", list(reversed(results))) == "summary"
+    assert CountingLLM.calls == 1
+
+def test_supervisor_fast_classify(supervisor):
+    assert supervisor.fast_classify("Search for the weather") == ("research", 1.0)
+    assert supervisor.fast_classify("Latest AI news") == ("research", 1.0)
+    assert supervisor.fast_classify("Any recent ideas?") == ("research", 0.5)
+    assert supervisor.fast_classify("Tell me a joke") == (None, 0.0)
+
+def test_supervisor_fast_classify_needs_a_leading_research_verb(supervisor):
+    from app.agents.supervisor_agent import FAST_PATH_CONFIDENCE_THRESHOLD
+
+    assert supervisor.fast_classify("Please find flights to Oslo") == ("research", 1.0)
+    for user_input in (
+        "I find cats cute, write a poem",
+        "write a poem about my findings",
+        "can you research nothing, just say hello",
+    ):
+        _, confidence = supervisor.fast_classify(user_input)
+        assert confidence < FAST_PATH_CONFIDENCE_THRESHOLD, user_input
+
+@pytest.mark.asyncio
+async def test_supervisor_fast_path_skips_llm():
+    class FailingLLM:
+        async def ainvoke(self, *args, **kwargs):
+            raise AssertionError("LLM should not be called")
+
+    agent = SupervisorAgent()
+    agent.llm = FailingLLM()
+    state = AgentState(
+        messages=[],
+        user_input="Find the latest research on fusion",
+        next_action=None, research_data=None, plan=None,
+        tools_used=[], tool_results={},
+        conversation_id="c1", user_id="u1",
+        current_agent="supervisor", workflow_status="in_progress",
+        working_memory={}, long_term_memory=None,
+        timestamp=None, session_data={}
+    )
+    updated = await agent.decide_action(state)
+    assert updated["next_action"] == "research"
+    assert updated["workflow_status"] == "in_progress"
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_synthesis_is_coalesced():
+    import asyncio
+    from types import SimpleNamespace
+    from app.agents.research_agent import ResearchAgent
+
+    class SlowLLM:
+        calls = 0
+
+        async def ainvoke(self, messages):
+            SlowLLM.calls += 1
+            await asyncio.sleep(0.05)
+            return SimpleNamespace(content="summary")
+
+    agent = ResearchAgent()
+    agent.llm = SlowLLM()
+    results = [{"tool": "a", "query": {"query": "x"}, "result": "1"}]
+    outputs = await asyncio.gather(*(agent._synthesize("q", results) for _ in range(3)))
+    assert outputs == ["summary"] * 3
+    assert SlowLLM.calls == 1
+    assert len(agent.inflight) == 0
+
+def test_should_research_keywords():
+    from app.agents.research_agent import ResearchAgent
+
+    agent = ResearchAgent()
+    assert agent.should_research({"user_input": "Find the LATEST results"})
+    assert agent.should_research({"user_input": "Tell me about black holes"})
+    assert not agent.should_research({"user_input": "Write a poem"})
+    assert agent.should_research({"user_input": "searching for cheap flights"})
+    assert agent.should_research({"user_input": "summarize your findings"})
+    assert agent.should_research({"user_input": "explained simply"})
+    assert not agent.should_research({"user_input": "show to the class"})
+
+def test_llm_manager_reuses_clients():
+    from app.core.llm import llm_manager
+
+    llm = llm_manager.get_non_streaming_llm(0.2)
+    assert llm_manager.get_non_streaming_llm(0.2) is llm
+    assert llm_manager.get_streaming_llm(0.2) is not llm
+
+@pytest.mark.asyncio
+async def test_llm_manager_aclose_releases_client():
+    from app.core.llm import LLMManager
+
+    manager = LLMManager()
+    client = manager._http_client
+    await manager.aclose()
+    assert client.is_closed
+    assert manager.llm is not None
+    assert manager._http_client is not client
+
+@pytest.mark.asyncio
+async def test_agents_follow_llm_manager_after_aclose():
+    from app.agents.research_agent import ResearchAgent
+    from app.agents.supervisor_agent import SupervisorAgent
+    from app.core.llm import llm_manager
+
+    research, supervisor = ResearchAgent(), SupervisorAgent()
+    old_chain = research.research_chain
+    await llm_manager.aclose()
+
+    assert not research.llm.http_async_client.is_closed
+    assert not supervisor.llm.http_async_client.is_closed
+    assert research.research_chain is not old_chain
@@ -1,16 +1,111 @@
 # ai_agent_project/tests/test_api.py
 
-from fastapi.testclient import TestClient
-from app.api.main import app
+import pytest
 
-client = TestClient(app)
-
-def test_root():
+def test_root(client):
     r = client.get("/")
     assert r.status_code == 200
     assert "Welcome" in r.json()["message"]
 
-def test_health():
+def test_health(client):
     r = client.get("/health")
     assert r.status_code == 200
     assert r.json()["status"] == "healthy"
+
+def test_chat_stream_completes(client):
+    r = client.post("/api/v1/chat/stream", json={"message": "Hello", "conversation_id": "s1"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert r.headers["x-accel-buffering"] == "no"
+    frames = [line for line in r.text.splitlines() if line.startswith("data: ")]
+    assert frames and '"type":"complete"' in frames[-1]
+
+@pytest.mark.asyncio
+async def test_keepalive_pings_while_idle():
+    import asyncio
+    from app.api.routes.chat import SSE_PING, with_keepalive
+
+    async def slow_frames():
+        await asyncio.sleep(0.05)
+        yield b"data: 1\n\n"
+
+    frames = [frame async for frame in with_keepalive(slow_frames(), interval=0.02)]
+    assert frames[-1] == b"data: 1\n\n"
+    assert SSE_PING in frames
+
+def test_sse_encoder_matches_stream_response():
+    import orjson
+    from app.api.models.responses import StreamResponse
+    from app.api.routes.chat import sse_encoder
+
+    frame = sse_encoder("c1")("token", "Hi", {"node": "research"})
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    message = StreamResponse.model_validate(orjson.loads(frame[6:]))
+    assert (message.type, message.content, message.conversation_id) == ("token", "Hi", "c1")
+
+@pytest.mark.asyncio
+async def test_coalesce_frames_merges_held_frames():
+    import asyncio
+    from app.api.routes.chat import coalesce_frames
+
+    async def frames():
+        yield b"a", True
+        yield b"b", True
+        yield b"c", False
+        yield b"d", True
+        await asyncio.sleep(0.05)
+        yield b"e", False
+
+    chunks = [chunk async for chunk in coalesce_frames(frames(), window=0.01)]
+    assert chunks == [b"abc", b"d", b"e"]
+
+def test_chat_batch_keeps_message_order(client, monkeypatch):
+    from app.graph.workflow import workflow
+
+    async def process_message(user_input, conversation_id, user_id, use_cache=True):
+        return {"response": f"echo: {user_input}", "conversation_id": conversation_id, "status": "completed"}
+
+    monkeypatch.setattr(workflow, "process_message", process_message)
+
+    r = client.post("/api/v1/chat/batch", json={"messages": ["one", "two"], "conversation_id": "b1"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["conversation_id"] == "b1"
+    assert [item["response"] for item in body["responses"]] == ["echo: one", "echo: two"]
+
+def test_conversation_messages_and_delete(client, monkeypatch):
+    from app.graph.workflow import workflow
+
+    async def decide_action(state):
+        state["next_action"] = "respond"
+        return state
+
+    async def direct_respond(user_input, use_cache=True):
+        return f"echo: {user_input}"
+
+    monkeypatch.setattr(workflow.supervisor_agent, "decide_action", decide_action)
+    monkeypatch.setattr(workflow, "_direct_respond", direct_respond)
+
+    for message in ("one", "two"):
+        client.post("/api/v1/chat", json={"message": message, "conversation_id": "h1"})
+
+    r = client.get("/api/v1/chat/h1/messages", params={"since": 2})
+    assert r.status_code == 200
+    assert r.json()["messages"] == [
+        {"role": "user", "content": "two"},
+        {"role": "assistant", "content": "echo: two"}
+    ]
+
+    history = client.get("/api/v1/chat/history/h1").json()
+    assert history["metadata"]["message_count"] == 4
+    assert history["messages"][-1] == {"role": "assistant", "content": "echo: two"}
+
+    assert client.delete("/api/v1/chat/h1").status_code == 200
+    assert client.get("/api/v1/chat/h1/messages").json()["messages"] == []
+
+def test_chat_batch_rejects_oversize_batch(client):
+    from app.api.models.requests import MAX_BATCH_MESSAGES
+
+    messages = ["hi"] * (MAX_BATCH_MESSAGES + 1)
+    r = client.post("/api/v1/chat/batch", json={"messages": messages, "conversation_id": "b2"})
+    assert r.status_code == 422
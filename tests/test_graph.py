@@ -1,6 +1,7 @@
 # ai_agent_project/tests/test_graph.py
 
 import pytest
+from app.graph.state import AgentState
 from app.graph.workflow import workflow
 
 @pytest.mark.asyncio
@@ -8,3 +9,170 @@ async def test_workflow_simple():
     res = await workflow.process_message("Hello", conversation_id="t1", user_id="u1")
     assert "response" in res
     assert res["status"] in ("completed", "error")
+
+@pytest.mark.asyncio
+async def test_stream_tokens_interleaved(monkeypatch):
+    async def decide_action(state):
+        state["next_action"] = "research"
+        return state
+
+    async def research_stream(state):
+        for token in ("Hel", "lo"):
+            yield token
+        state["research_data"] = {"synthesis": "Hello"}
+
+    monkeypatch.setattr(workflow.supervisor_agent, "decide_action", decide_action)
+    monkeypatch.setattr(workflow.research_agent, "research_stream", research_stream)
+
+    events = [
+        event async for event in workflow.stream_process_message(
+            "Find news", conversation_id="t2", user_id="u1", stream_tokens=True
+        )
+    ]
+    tokens = [data for name, data in events if name == "token"]
+    assert tokens == ["Hel", "lo"]
+    assert any(name == "respond" for name, _ in events)
+
+@pytest.mark.asyncio
+async def test_speculative_research(monkeypatch):
+    import asyncio
+
+    calls = []
+
+    async def research(state):
+        calls.append(state["user_input"])
+        await asyncio.sleep(0.05)
+        state["research_data"] = {"synthesis": "prefetched"}
+        state["tools_used"].append("web_search")
+        return state
+
+    def decider(action):
+        async def decide_action(state):
+            await asyncio.sleep(0.1)
+            state["next_action"] = action
+            return state
+        return decide_action
+
+    def make_state():
+        return AgentState(
+            messages=[], user_input="Any recent ideas?",
+            next_action=None, research_data=None, plan=None,
+            tools_used=[], tool_results={},
+            conversation_id="c1", user_id="u1",
+            current_agent="supervisor", workflow_status="in_progress",
+            working_memory={}, long_term_memory=None,
+            timestamp=None, session_data={}
+        )
+
+    monkeypatch.setattr(workflow.research_agent, "research", research)
+
+    monkeypatch.setattr(workflow.supervisor_agent, "decide_action", decider("research"))
+    state = await workflow._supervisor_node(make_state(), {})
+    assert state["research_data"] == {"synthesis": "prefetched"}
+    assert state["tools_used"] == ["web_search"]
+    assert state["working_memory"]["research_prefetched"] is True
+    assert (await workflow._research_node(state, {})) is state
+    assert len(calls) == 1
+
+    monkeypatch.setattr(workflow.supervisor_agent, "decide_action", decider("respond"))
+    state = await workflow._supervisor_node(make_state(), {})
+    assert state["research_data"] is None
+    assert state["tools_used"] == []
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_direct_response_is_cached(monkeypatch):
+    from types import SimpleNamespace
+    from app.core.llm import llm_manager
+
+    class CountingLLM:
+        calls = 0
+
+        async def ainvoke(self, messages):
+            CountingLLM.calls += 1
+            return SimpleNamespace(content=f"answer {CountingLLM.calls}")
+
+    monkeypatch.setattr(llm_manager, "_llm", CountingLLM())
+    workflow.response_cache.clear()
+
+    assert await workflow._direct_respond("Hi there") == "answer 1"
+    assert await workflow._direct_respond("Hi there") == "answer 1"
+    assert await workflow._direct_respond("Hi there", use_cache=False) == "answer 2"
+    assert CountingLLM.calls == 2
+
+@pytest.mark.asyncio
+async def test_process_message_returns_final_message(monkeypatch):
+    async def decide_action(state):
+        state["next_action"] = "respond"
+        return state
+
+    async def direct_respond(user_input, use_cache=True):
+        return f"echo: {user_input}"
+
+    monkeypatch.setattr(workflow.supervisor_agent, "decide_action", decide_action)
+    monkeypatch.setattr(workflow, "_direct_respond", direct_respond)
+
+    res = await workflow.process_message("Hello", conversation_id="t4", user_id="u1")
+    assert res["status"] == "completed"
+    assert res["response"] == "echo: Hello"
+
+def test_memory_saver_evicts_oldest_thread():
+    from langgraph.checkpoint.base import empty_checkpoint
+    from app.graph.workflow import _LRUMemorySaver
+
+    saver = _LRUMemorySaver(max_threads=2)
+    for thread_id in ("a", "b", "a", "c"):
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+        saver.put(config, empty_checkpoint(), {}, {})
+
+    assert set(saver.storage) == {"a", "c"}
+
+@pytest.mark.asyncio
+async def test_stream_direct_response_tokens(monkeypatch):
+    from types import SimpleNamespace
+    from app.core.llm import llm_manager
+
+    async def decide_action(state):
+        state["next_action"] = "respond"
+        return state
+
+    class StreamingLLM:
+        async def astream(self, messages):
+            for token in ("Hi ", "there"):
+                yield SimpleNamespace(content=token)
+
+    monkeypatch.setattr(workflow.supervisor_agent, "decide_action", decide_action)
+    monkeypatch.setattr(llm_manager, "_llm", StreamingLLM())
+    workflow.response_cache.clear()
+
+    events = [
+        event async for event in workflow.stream_process_message(
+            "Say hi", conversation_id="t5", user_id="u1", stream_tokens=True
+        )
+    ]
+    assert [data for name, data in events if name == "token"] == ["Hi ", "there"]
+    respond = next(data for name, data in events if name == "respond")
+    assert respond["messages"][-1].content == "Hi there"
+
+@pytest.mark.asyncio
+async def test_research_turn_stores_synthesis_once(monkeypatch):
+    async def decide_action(state):
+        state["next_action"] = "research"
+        return state
+
+    async def gather_research(state, user_query):
+        return []
+
+    async def synthesize(query, results):
+        return "SYNTH"
+
+    monkeypatch.setattr(workflow.supervisor_agent, "decide_action", decide_action)
+    monkeypatch.setattr(workflow.research_agent, "_gather_research", gather_research)
+    monkeypatch.setattr(workflow.research_agent, "_synthesize", synthesize)
+
+    res = await workflow.process_message("search x", conversation_id="t6", user_id="u1")
+    assert res["response"] == "SYNTH"
+    assert await workflow.get_messages("t6") == [
+        {"role": "user", "content": "search x"},
+        {"role": "assistant", "content": "SYNTH"}
+    ]
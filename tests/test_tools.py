@@ -0,0 +1,142 @@
+# ai_agent_project/tests/test_tools.py
+
+import asyncio
+import httpx
+import pytest
+from app.core.config import get_settings
+from app.tools.web_search import TavilySearchTool, _search_cache
+
+@pytest.mark.asyncio
+async def test_tavily_uses_injected_async_client(monkeypatch):
+    monkeypatch.setattr(get_settings(), "tavily_api_key", "key")
+    _search_cache.clear()
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={
+            "answer": "42",
+            "results": [{"title": "T", "content": "C", "url": "https://example.com"}]
+        })
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        tool = TavilySearchTool(client=client)
+        result, repeat = await asyncio.gather(
+            tool._arun("meaning of life", max_results=1),
+            tool._arun("meaning of life", max_results=1)
+        )
+        assert await tool._arun("meaning of life", max_results=1) == result
+
+    assert len(requests) == 1
+    assert repeat == result
+    assert "**Answer:** 42" in result
+    assert "Source: https://example.com" in result
+
+def test_calculator_evaluates_arithmetic():
+    from app.tools.calculator import CalculatorTool
+
+    tool = CalculatorTool()
+    assert tool._run("2 + 3 * 4") == "14"
+    assert tool._run("-(2 ** 3) / 4") == "-2.0"
+    assert tool._run("7 // 2 % 3") == "0"
+
+def test_calculator_rejects_code_and_huge_powers():
+    from app.tools.calculator import CalculatorTool
+
+    tool = CalculatorTool()
+    assert tool._run("__import__('os').getcwd()").startswith("Error:")
+    assert tool._run("(1).__class__").startswith("Error:")
+    assert tool._run("9 ** 9 ** 9").startswith("Error:")
+    assert tool._run("((9 ** 999) ** 999) ** 999").startswith("Error:")
+    assert tool._run("9 ** 999 * 9 ** 999 * 9 ** 999 * 9 ** 999").startswith("Error:")
+    assert tool._run("2 ** 1000") == str(2 ** 1000)
+
+@pytest.mark.asyncio
+async def test_file_handler_writes_async(tmp_path, monkeypatch):
+    from app.tools.file_handler import FileHandlerTool
+
+    monkeypatch.setattr(get_settings(), "file_sandbox_dir", str(tmp_path))
+    tool = FileHandlerTool()
+    result = await tool._arun("sub/note.txt", "héllo\nwörld")
+    assert result == "File sub/note.txt saved."
+    tool._run("sync.txt", "héllo\nwörld")
+    assert (tmp_path / "sub" / "note.txt").read_bytes() == (tmp_path / "sync.txt").read_bytes()
+    assert (tmp_path / "sync.txt").read_bytes() == "héllo\nwörld".encode("utf-8")
+
+def test_file_handler_rejects_paths_outside_sandbox(tmp_path, monkeypatch):
+    from app.tools.file_handler import SANDBOX_ERROR, FileHandlerTool
+
+    monkeypatch.setattr(get_settings(), "file_sandbox_dir", str(tmp_path / "box"))
+    tool = FileHandlerTool()
+    assert tool._run("../escape.txt", "x") == SANDBOX_ERROR
+    assert not (tmp_path / "escape.txt").exists()
+    assert tool._run("sub/ok.txt", "hi") == "File sub/ok.txt saved."
+    assert (tmp_path / "box" / "sub" / "ok.txt").read_text() == "hi"
+
+@pytest.mark.asyncio
+async def test_calculator_arun_times_out(monkeypatch):
+    import time
+    from app.tools.calculator import CalculatorTool
+
+    monkeypatch.setattr(get_settings(), "tool_timeout_seconds", 0.01)
+    monkeypatch.setattr(CalculatorTool, "_run", lambda self, expression: time.sleep(0.1))
+    assert await CalculatorTool()._arun("1 + 1") == "Error: calculation timed out"
+
+@pytest.mark.asyncio
+async def test_web_search_arun_runs_concurrently(monkeypatch):
+    import asyncio
+    import time
+    from app.tools.web_search import WebSearchTool
+
+    def slow_search(self, query, max_results):
+        time.sleep(0.1)
+        return f"results for {query}"
+
+    async def html_search_unavailable(self, query, max_results):
+        return None
+
+    monkeypatch.setattr(WebSearchTool, "_duckduckgo_html_search", html_search_unavailable)
+    monkeypatch.setattr(WebSearchTool, "_duckduckgo_search", slow_search)
+    tool = WebSearchTool()
+    start = time.perf_counter()
+    results = await asyncio.gather(tool._arun("a"), tool._arun("b"), tool._arun("c"))
+    assert results == ["results for a", "results for b", "results for c"]
+    assert time.perf_counter() - start < 0.25
+
+@pytest.mark.asyncio
+async def test_multi_search_keeps_query_order():
+    from app.tools.web_search import multi_search
+
+    class EchoTool:
+        async def _arun(self, query, max_results=5):
+            await asyncio.sleep(0.01 if query == "a" else 0)
+            return f"{query}:{max_results}"
+
+    assert await multi_search(["a", "b"], EchoTool(), max_results=2) == ["a:2", "b:2"]
+
+@pytest.mark.asyncio
+async def test_web_search_parses_duckduckgo_html():
+    from app.tools.web_search import WebSearchTool, _search_cache
+
+    _search_cache.clear()
+    html = """
+    <div class="result">
+      <a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com%2Fa">Example <b>A</b></a>
+      <a class="result__snippet">First snippet</a>
+    </div>
+    <div class="result">
+      <a class="result__a" href="https://example.com/b">Example B</a>
+    </div>
+    """
+
+    def handler(request):
+        assert request.url.params["q"] == "example"
+        return httpx.Response(200, text=html)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        result = await WebSearchTool(client=client)._arun("example", max_results=1)
+
+    assert "1. **Example A**" in result
+    assert "First snippet" in result
+    assert "Source: https://example.com/a" in result
+    assert "Example B" not in result
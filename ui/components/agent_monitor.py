@@ -1,10 +1,9 @@
 # ai_agent_project/ui/components/agent_monitor.py
 
 import streamlit as st
+from html import escape
+
+AGENT_STATUS_TEMPLATE = '<div class="agent-status">🔄 <strong>Status:</strong> {}</div>'
 
 def render_agent_status(status):
-    st.markdown(f"""
-    <div class="agent-status">
-      🔄 <strong>Status:</strong> {status}
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(AGENT_STATUS_TEMPLATE.format(escape(str(status))), unsafe_allow_html=True)
@@ -0,0 +1,37 @@
+# ai_agent_project/ui/components/api_client.py
+
+import atexit
+import socket
+import httpx
+import streamlit as st
+
+API_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+# A backend that is down should fail fast, not after the full read timeout
+API_TIMEOUT = httpx.Timeout(30.0, connect=2.0)
+# A local port check answers well within this
+HEALTH_CONNECT_TIMEOUT = 0.2
+# How long one health probe answers for every rerun; Refresh Status clears it early
+HEALTH_CACHE_TTL_SECONDS = 10
+
+@st.cache_resource
+def get_api_client() -> httpx.Client:
+    """One pooled HTTP client shared by every session of this Streamlit server."""
+    client = httpx.Client(http2=True, limits=API_LIMITS, timeout=API_TIMEOUT)
+    atexit.register(client.close)
+    return client
+
+@st.cache_data(ttl=HEALTH_CACHE_TTL_SECONDS, show_spinner=False)
+def probe_health(base_url: str) -> bool:
+    """
+    Check that the backend port accepts connections, reusing the answer for a few seconds across reruns.
+    
+    A bare TCP connect is enough for the status indicator; a backend that
+    is up but failing still surfaces as an error when a message is sent.
+    """
+    url = httpx.URL(base_url)
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        socket.create_connection((url.host, port), timeout=HEALTH_CONNECT_TIMEOUT).close()
+        return True
+    except OSError:
+        return False
@@ -2,17 +2,11 @@
 
 import streamlit as st
 
+def render_message(role, content):
+    # Native chat container with plain markdown: no HTML wrapper to sanitize or ship
+    with st.chat_message(role):
+        st.markdown(content)
+
 def render_chat(messages):
     for msg in messages:
-        if msg["role"] == "user":
-            st.markdown(f"""
-            <div class="chat-message user-message">
-              <strong>🧑 You:</strong><br>{msg["content"]}
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class="chat-message assistant-message">
-              <strong>🤖 Assistant:</strong><br>{msg["content"]}
-            </div>
-            """, unsafe_allow_html=True)
+        render_message(msg["role"], msg["content"])
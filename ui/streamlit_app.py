@@ -2,9 +2,12 @@
 Simplified Streamlit application for the AI Agent interface.
 """
 import streamlit as st
-import requests
-import json
-import uuid
+import orjson
+import re
+import secrets
+from contextlib import closing
+from components.api_client import HEALTH_CACHE_TTL_SECONDS, get_api_client, probe_health
+from components.chat_interface import render_chat, render_message
 
 # Page configuration
 st.set_page_config(
@@ -15,7 +18,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
@@ -26,20 +29,17 @@ st.markdown("""
         margin-bottom: 2rem;
     }
     
-    .chat-message {
+    [data-testid="stChatMessage"] {
         padding: 1rem;
         border-radius: 10px;
         margin: 1rem 0;
+        background-color: #f1f8e9;
+        border-left: 4px solid #4caf50;
     }
     
-    .user-message {
+    [data-testid="stChatMessage"]:has([data-testid="stChatMessageAvatarUser"]) {
         background-color: #e3f2fd;
-        border-left: 4px solid #2196f3;
-    }
-    
-    .assistant-message {
-        background-color: #f1f8e9;
-        border-left: 4px solid #4caf50;
+        border-left-color: #2196f3;
     }
     
     .status-indicator {
@@ -52,48 +52,74 @@ st.markdown("""
     .connected { background-color: #e8f5e8; color: #2e7d32; }
     .disconnected { background-color: #ffebee; color: #c62828; }
 </style>
-""", unsafe_allow_html=True)
+"""
+# Collapsed once at import to shrink what every run sends to the browser
+CUSTOM_CSS = re.sub(r"\s+", " ", CUSTOM_CSS).strip()
+
+HEADER_HTML = (
+    '<div class="main-header">'
+    '<h1>🤖 AI Agent Assistant</h1>'
+    '<p>Powered by LangGraph, Azure OpenAI & FastAPI</p>'
+    '</div>'
+)
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"
+# Request bodies are pre-serialized with orjson
+JSON_HEADERS = {"Content-Type": "application/json"}
+# Older messages stay in session state but are not redrawn on every rerun
+MAX_VISIBLE_MESSAGES = 50
+# The backend's /chat/batch limit; extra example clicks are dropped
+MAX_BATCH_MESSAGES = 10
 
 def initialize_session_state():
     """Initialize session state variables."""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    st.session_state.setdefault("messages", [])
+    # Older messages live in the backend; this counts those not held here
+    st.session_state.setdefault("history_offset", 0)
     
     if "conversation_id" not in st.session_state:
-        st.session_state.conversation_id = str(uuid.uuid4())
-    
-    if "api_status" not in st.session_state:
-        st.session_state.api_status = None
+        # The URL keeps the conversation across page refreshes
+        conversation_id = st.query_params.get("conversation_id")
+        if conversation_id:
+            set_conversation_id(conversation_id)
+            st.session_state.messages = fetch_messages_from_api() or []
+        else:
+            start_new_conversation()
+
+def set_conversation_id(conversation_id: str):
+    """Store the conversation ID along with its short form for display."""
+    st.session_state.conversation_id = conversation_id
+    st.session_state.conversation_id_short = conversation_id[:8]
+
+def start_new_conversation():
+    """Switch to a fresh conversation ID and put it in the URL."""
+    set_conversation_id(secrets.token_hex(16))
+    st.query_params["conversation_id"] = st.session_state.conversation_id
 
 def check_api_status():
     """Check if the FastAPI backend is running."""
-    try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5.0)
-        if response.status_code == 200:
-            return True, "Connected"
-    except Exception as e:
-        return False, f"Disconnected: {str(e)}"
-    
+    if probe_health(API_BASE_URL):
+        return True, "Connected"
     return False, "Disconnected"
 
 def send_message_to_api(message: str):
     """Send a message to the FastAPI backend."""
     try:
-        response = requests.post(
+        body = orjson.dumps({
+            "message": message,
+            "conversation_id": st.session_state.conversation_id,
+            "user_id": "streamlit_user"
+        })
+        response = get_api_client().post(
             f"{API_BASE_URL}/api/v1/chat",
-            json={
-                "message": message,
-                "conversation_id": st.session_state.conversation_id,
-                "user_id": "streamlit_user"
-            },
+            content=body,
+            headers=JSON_HEADERS,
             timeout=30.0
         )
         
         if response.status_code == 200:
-            return response.json()
+            return orjson.loads(response.content)
         else:
             st.error(f"API Error: {response.status_code} - {response.text}")
             return None
@@ -102,101 +128,207 @@ def send_message_to_api(message: str):
         st.error(f"Connection error: {str(e)}")
         return None
 
-def render_sidebar():
-    """Render the sidebar with configuration options."""
-    with st.sidebar:
-        st.header("🤖 AI Agent Settings")
-        
-        # API Status
-        is_connected, status_msg = check_api_status()
-        status_color = "connected" if is_connected else "disconnected"
-        status_icon = "🟢" if is_connected else "🔴"
-        
-        st.markdown(f"""
-        <div class="status-indicator {status_color}">
-            {status_icon} <strong>API Status:</strong> {status_msg}
-        </div>
-        """, unsafe_allow_html=True)
-        
-        if not is_connected:
-            st.warning("⚠️ FastAPI backend is not running!")
-            st.info("💡 Start the backend with: `uvicorn app.api.main:app --reload`")
-            if st.button("🔄 Refresh Status"):
-                st.rerun()
-        
-        st.divider()
-        
-        # Conversation Settings
-        st.subheader("💬 Conversation")
-        
-        # Display current conversation ID
-        st.text(f"ID: {st.session_state.conversation_id[:8]}...")
+def fetch_messages_from_api(since: int = 0):
+    """Fetch the conversation's stored messages from the FastAPI backend."""
+    try:
+        response = get_api_client().get(
+            f"{API_BASE_URL}/api/v1/chat/{st.session_state.conversation_id}/messages",
+            params={"since": since}
+        )
         
-        # New conversation button
-        if st.button("🆕 New Conversation"):
-            st.session_state.messages = []
-            st.session_state.conversation_id = str(uuid.uuid4())
-            st.rerun()
+        if response.status_code == 200:
+            return orjson.loads(response.content)["messages"]
+        else:
+            st.error(f"API Error: {response.status_code} - {response.text}")
+            return None
+    
+    except Exception as e:
+        st.error(f"Connection error: {str(e)}")
+        return None
+
+def delete_conversation_from_api():
+    """Delete the conversation's stored history in the FastAPI backend."""
+    try:
+        response = get_api_client().delete(
+            f"{API_BASE_URL}/api/v1/chat/{st.session_state.conversation_id}"
+        )
+        if response.status_code != 200:
+            st.error(f"API Error: {response.status_code} - {response.text}")
+    
+    except Exception as e:
+        st.error(f"Connection error: {str(e)}")
+
+def send_messages_to_api(messages):
+    """Send several messages to the FastAPI backend in one batch request."""
+    try:
+        body = orjson.dumps({
+            "messages": messages,
+            "conversation_id": st.session_state.conversation_id,
+            "user_id": "streamlit_user"
+        })
+        response = get_api_client().post(
+            f"{API_BASE_URL}/api/v1/chat/batch",
+            content=body,
+            headers=JSON_HEADERS,
+            timeout=30.0 * len(messages)
+        )
         
-        # Clear history button
-        if st.button("🗑️ Clear History"):
-            st.session_state.messages = []
+        if response.status_code == 200:
+            return orjson.loads(response.content)["responses"]
+        else:
+            st.error(f"API Error: {response.status_code} - {response.text}")
+            return None
+    
+    except Exception as e:
+        st.error(f"Connection error: {str(e)}")
+        return None
+
+def stream_message_from_api(message: str):
+    """
+    Stream the agent's reply from the FastAPI backend as text chunks.
+    
+    Every SSE line yields, with "" for pings, separators and status frames,
+    so the caller gets control back between frames and can be stopped.
+    """
+    streamed_tokens = False
+    try:
+        body = orjson.dumps({
+            "message": message,
+            "conversation_id": st.session_state.conversation_id,
+            "user_id": "streamlit_user",
+            "stream_type": "all"
+        })
+        with get_api_client().stream(
+            "POST",
+            f"{API_BASE_URL}/api/v1/chat/stream",
+            content=body,
+            headers=JSON_HEADERS
+        ) as response:
+            if response.status_code != 200:
+                response.read()
+                st.error(f"API Error: {response.status_code} - {response.text}")
+                return
+            
+            for line in response.iter_lines():
+                chunk = ""
+                if line.startswith("data: "):
+                    event = orjson.loads(line[6:])
+                    if event["type"] == "token":
+                        streamed_tokens = True
+                        chunk = event["content"]
+                    elif event["type"] == "message":
+                        # Answers normally arrive token by token
+                        failed = event["metadata"].get("status") == "error"
+                        if failed or (event["metadata"].get("node") == "respond" and not streamed_tokens):
+                            chunk = event["content"]
+                    elif event["type"] == "error":
+                        chunk = f"\n\n⚠️ {event['content']}"
+                    elif event["type"] == "complete":
+                        return
+                
+                yield chunk
+    
+    except Exception as e:
+        st.error(f"Connection error: {str(e)}")
+
+# Refreshes the API status on its own schedule; chat reruns don't wait on it
+@st.fragment(run_every=HEALTH_CACHE_TTL_SECONDS)
+def render_sidebar():
+    """Render the sidebar with configuration options."""
+    st.header("🤖 AI Agent Settings")
+    
+    # API Status
+    is_connected, status_msg = check_api_status()
+    status_color = "connected" if is_connected else "disconnected"
+    status_icon = "🟢" if is_connected else "🔴"
+    # Fragments can't return to the caller, so share the status through session state
+    st.session_state.api_connected = is_connected
+    
+    st.markdown(f"""
+    <div class="status-indicator {status_color}">
+        {status_icon} <strong>API Status:</strong> {status_msg}
+    </div>
+    """, unsafe_allow_html=True)
+    
+    if not is_connected:
+        st.warning("⚠️ FastAPI backend is not running!")
+        st.info("💡 Start the backend with: `uvicorn app.api.main:app --reload`")
+        if st.button("🔄 Refresh Status"):
+            probe_health.clear()
             st.rerun()
-        
-        st.divider()
-        
-        # Instructions
-        st.subheader("ℹ️ How to Use")
-        st.markdown("""
-        1. **Start Backend**: Run `uvicorn app.api.main:app --reload`
-        2. **Type Message**: Enter your message in the chat input below
-        3. **Send**: Press Enter or click send
-        4. **View Response**: See the AI agent's response
-        
-        **Example Messages:**
-        - "Hello, how are you?"
-        - "What can you help me with?"
-        - "Tell me about AI agents"
-        """)
-        
-        return is_connected
+    
+    st.divider()
+    
+    # Conversation Settings
+    st.subheader("💬 Conversation")
+    
+    # Display current conversation ID
+    st.text(f"ID: {st.session_state.conversation_id_short}...")
+    
+    # New conversation button
+    if st.button("🆕 New Conversation"):
+        st.session_state.messages = []
+        st.session_state.history_offset = 0
+        st.session_state.show_full_history = False
+        start_new_conversation()
+        st.rerun()
+    
+    # Streaming toggle
+    st.toggle("⚡ Stream responses", value=True, key="stream_responses")
+    
+    # Clear history button
+    if st.button("🗑️ Clear History"):
+        delete_conversation_from_api()
+        st.session_state.messages = []
+        st.session_state.history_offset = 0
+        st.session_state.show_full_history = False
+        st.rerun()
+    
+    st.divider()
+    
+    # Instructions
+    st.subheader("ℹ️ How to Use")
+    st.markdown("""
+    1. **Start Backend**: Run `uvicorn app.api.main:app --reload`
+    2. **Type Message**: Enter your message in the chat input below
+    3. **Send**: Press Enter or click send
+    4. **View Response**: See the AI agent's response
+    
+    **Example Messages:**
+    - "Hello, how are you?"
+    - "What can you help me with?"
+    - "Tell me about AI agents"
+    """)
 
 def render_chat_interface(api_connected):
     """Render the main chat interface."""
-    # Header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🤖 AI Agent Assistant</h1>
-        <p>Powered by LangGraph, Azure OpenAI & FastAPI</p>
-    </div>
-    """, unsafe_allow_html=True)
+    # Header, as raw HTML without a markdown parsing pass
+    st.html(HEADER_HTML)
     
-    # Display conversation messages
-    if st.session_state.messages:
-        for message in st.session_state.messages:
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <strong>🧑 You:</strong><br>
-                    {message["content"]}
-                </div>
-                """, unsafe_allow_html=True)
-            
-            elif message["role"] == "assistant":
-                st.markdown(f"""
-                <div class="chat-message assistant-message">
-                    <strong>🤖 Assistant:</strong><br>
-                    {message["content"]}
-                </div>
-                """, unsafe_allow_html=True)
+    # Keep only the most recent messages client-side unless asked for all
+    history = st.session_state.messages
+    excess = len(history) - MAX_VISIBLE_MESSAGES
+    if excess > 0 and not st.session_state.get("show_full_history"):
+        st.session_state.history_offset += excess
+        st.session_state.messages = history = history[excess:]
+    
+    if history:
+        hidden = st.session_state.history_offset
+        if hidden > 0:
+            st.caption(f"… {hidden} earlier messages")
+            if st.button("⬆️ Load earlier messages"):
+                # The backend holds the full conversation
+                full_history = fetch_messages_from_api()
+                if full_history is not None:
+                    st.session_state.messages = full_history
+                    st.session_state.history_offset = 0
+                    st.session_state.show_full_history = True
+                    st.rerun()
+        
+        render_chat(history)
     else:
         # Show welcome message when no conversation exists
-        st.markdown("""
-        <div class="chat-message assistant-message">
-            <strong>🤖 Assistant:</strong><br>
-            Welcome! I'm your AI Agent Assistant. Type a message below to get started.
-        </div>
-        """, unsafe_allow_html=True)
+        render_message("assistant", "Welcome! I'm your AI Agent Assistant. Type a message below to get started.")
     
     # Chat input
     if api_connected:
@@ -207,6 +339,28 @@ def render_chat_interface(api_connected):
         st.error("⚠️ Cannot send messages. API backend is not available.")
         st.info("💡 Please start the FastAPI server first.")
 
+def collect_stream(message: str, heartbeat):
+    """Relay the streamed reply, keeping what has arrived so a stopped reply isn't lost."""
+    st.session_state.partial_response = []
+    with closing(stream_message_from_api(message)) as chunks:
+        for chunk in chunks:
+            if not chunk:
+                # st.write_stream skips empty chunks; touching an element gives
+                # Streamlit the point where a Stop click interrupts the run
+                heartbeat.empty()
+                continue
+            st.session_state.partial_response.append(chunk)
+            yield chunk
+
+def stop_generation():
+    """Keep the part of the reply that arrived before Stop was clicked."""
+    partial = st.session_state.pop("partial_response", None)
+    if partial:
+        st.session_state.messages.append({
+            "role": "assistant",
+            "content": "".join(partial) + "\n\n⏹ *Stopped*"
+        })
+
 def handle_user_input(user_input: str):
     """Handle user input and get agent response."""
     # Add user message to session state
@@ -215,13 +369,23 @@ def handle_user_input(user_input: str):
         "content": user_input
     })
     
-    # Show user message immediately
-    st.markdown(f"""
-    <div class="chat-message user-message">
-        <strong>🧑 You:</strong><br>
-        {user_input}
-    </div>
-    """, unsafe_allow_html=True)
+    # Append the new turn in place; earlier messages are already on the page
+    render_message("user", user_input)
+    
+    if st.session_state.get("stream_responses", True):
+        # Render the reply as it is generated
+        with st.chat_message("assistant"):
+            # Clicking interrupts this run, which closes the stream and the backend request
+            st.button("⏹ Stop", key="stop_generation", on_click=stop_generation)
+            heartbeat = st.empty()
+            assistant_response = st.write_stream(collect_stream(user_input, heartbeat))
+        st.session_state.pop("partial_response", None)
+        if assistant_response:
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": assistant_response
+            })
+        return
     
     # Get agent response
     with st.spinner("🤖 Agent is thinking..."):
@@ -236,21 +400,35 @@ def handle_user_input(user_input: str):
             "content": assistant_response
         })
         
-        # Display assistant response
-        st.markdown(f"""
-        <div class="chat-message assistant-message">
-            <strong>🤖 Assistant:</strong><br>
-            {assistant_response}
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Show additional info if available
-        if response_data.get("tools_used"):
-            st.info(f"🛠️ Tools used: {', '.join(response_data['tools_used'])}")
-    
-    # Force a rerun to update the interface
-    st.rerun()
+        with st.chat_message("assistant"):
+            st.markdown(assistant_response)
+            
+            # Show additional info if available
+            if response_data.get("tools_used"):
+                st.info(f"🛠️ Tools used: {', '.join(response_data['tools_used'])}")
 
+# Example queries with stable button keys
+BASIC_EXAMPLES = tuple((example, f"ex1_{i}") for i, example in enumerate((
+    "Hello, how are you?",
+    "What can you help me with?",
+    "Tell me about yourself",
+    "How do you work?"
+)))
+QUESTION_EXAMPLES = tuple((example, f"ex2_{i}") for i, example in enumerate((
+    "Explain artificial intelligence",
+    "What is machine learning?",
+    "How do chatbots work?",
+    "Tell me a fun fact"
+)))
+
+def select_example(example: str):
+    """Queue an example query to be sent on the next run."""
+    queue = st.session_state.setdefault("example_queue", [])
+    if len(queue) < MAX_BATCH_MESSAGES:
+        queue.append(example)
+
+# A fragment: the static panel is skipped when other widgets rerun the page
+@st.fragment
 def render_example_queries():
     """Render example queries for users to try."""
     with st.expander("💡 Example Queries to Try"):
@@ -258,50 +436,57 @@ def render_example_queries():
         
         with col1:
             st.markdown("**💬 Basic Conversations:**")
-            examples_1 = [
-                "Hello, how are you?",
-                "What can you help me with?",
-                "Tell me about yourself",
-                "How do you work?"
-            ]
-            
-            for example in examples_1:
-                if st.button(f"📝 {example}", key=f"ex1_{hash(example)}"):
-                    st.session_state.example_query = example
+            for example, key in BASIC_EXAMPLES:
+                # Clicks inside a fragment only rerun the fragment, so bring the whole page along
+                if st.button(f"📝 {example}", key=key, on_click=select_example, args=(example,)):
+                    st.rerun()
         
         with col2:
             st.markdown("**🤔 Questions:**")
-            examples_2 = [
-                "Explain artificial intelligence",
-                "What is machine learning?",
-                "How do chatbots work?",
-                "Tell me a fun fact"
-            ]
-            
-            for example in examples_2:
-                if st.button(f"📝 {example}", key=f"ex2_{hash(example)}"):
-                    st.session_state.example_query = example
-    
-    # Handle example query selection
-    if hasattr(st.session_state, 'example_query'):
-        handle_user_input(st.session_state.example_query)
-        # Clear the example query
-        delattr(st.session_state, 'example_query')
+            for example, key in QUESTION_EXAMPLES:
+                if st.button(f"📝 {example}", key=key, on_click=select_example, args=(example,)):
+                    st.rerun()
+
+def handle_example_queries():
+    """Send queued example queries, clearing the queue so each is only sent once."""
+    queue = st.session_state.pop("example_queue", None)
+    if not queue:
+        return
+    if len(queue) == 1:
+        handle_user_input(queue[0])
+        return
+    
+    # Several clicks landed before this run: one batch request for all of them
+    with st.spinner("🤖 Agent is thinking..."):
+        responses = send_messages_to_api(queue)
+    
+    for example, response_data in zip(queue, responses or ()):
+        assistant_response = response_data.get("response", "No response generated.")
+        st.session_state.messages.append({"role": "user", "content": example})
+        st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+        render_message("user", example)
+        render_message("assistant", assistant_response)
 
 def main():
     """Main application runner."""
+    # Streamlit rebuilds the page each run, so the styles are sent every time
+    st.html(CUSTOM_CSS)
+    
     # Initialize session state
     initialize_session_state()
     
-    # Render sidebar and get API connection status
-    api_connected = render_sidebar()
+    # Render sidebar, which records the API connection status
+    with st.sidebar:
+        render_sidebar()
     
     # Render main chat interface
-    render_chat_interface(api_connected)
+    render_chat_interface(st.session_state.api_connected)
+    handle_example_queries()
     
     # Render example queries if no conversation exists
     if not st.session_state.messages:
         render_example_queries()
 
-if __name__ == "__main__":
+# Run only under a Streamlit server; plain imports stay inert
+if st.runtime.exists():
     main()
\ No newline at end of file